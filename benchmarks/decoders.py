@@ -0,0 +1,38 @@
+import argparse
+import time
+
+from benchmarks.payloads import load_recorded, synthetic_stream
+from core.decoder import available_decoders, get_decoder
+
+
+def bench(decoder, messages, mode: str, repeat: int) -> float:
+    decode = decoder.decode_book if mode == "book" else decoder.loads
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for message in messages:
+            decode(message)
+        best = min(best, time.perf_counter() - start)
+    return best / len(messages) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare message decoders on OKX L2 payloads")
+    parser.add_argument("--file", help="recorded market data file (recorder format or newline-delimited JSON; default: synthetic)")
+    parser.add_argument("--depth", type=int, default=400)
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    messages = load_recorded(args.file) if args.file else synthetic_stream(args.count, args.depth)
+    print(f"{len(messages)} messages, best of {args.repeat}")
+    print(f"{'decoder':<10} {'loads (us/msg)':>16} {'decode_book (us/msg)':>22}")
+    for name in available_decoders():
+        decoder = get_decoder(name)
+        loads_us = bench(decoder, messages, "loads", args.repeat)
+        book_us = bench(decoder, messages, "book", args.repeat)
+        print(f"{name:<10} {loads_us:>16.2f} {book_us:>22.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import json
+import random
+from typing import List
+
+from core.market_data import read_records
+
+
+def synthetic_okx_payload(depth: int = 400, mid: float = 95000.0, tick: float = 0.1, seed: int = 0) -> str:
+    """An L2 snapshot shaped like the gomarket OKX feed, with ``depth`` levels per side."""
+    rng = random.Random(seed)
+    asks = [[f"{mid + tick * (i + 1):.1f}", f"{rng.uniform(0.01, 50.0):.2f}"] for i in range(depth)]
+    bids = [[f"{mid - tick * i:.1f}", f"{rng.uniform(0.01, 50.0):.2f}"] for i in range(depth)]
+    return json.dumps({
+        "timestamp": "2025-05-04T10:39:13Z",
+        "exchange": "OKX",
+        "symbol": "BTC-USDT-SWAP",
+        "asks": asks,
+        "bids": bids,
+    })
+
+
+def synthetic_stream(count: int, depth: int = 400, seed: int = 0) -> List[str]:
+    """``count`` snapshots with a randomly walking mid price."""
+    rng = random.Random(seed)
+    mid = 95000.0
+    messages = []
+    for i in range(count):
+        mid += rng.choice((-0.1, 0.0, 0.1))
+        messages.append(synthetic_okx_payload(depth, mid=mid, seed=seed + i))
+    return messages
+
+
+def load_messages(path: str) -> List[str]:
+    """Raw messages from a newline-delimited file, one JSON payload per line."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def load_recorded(path: str) -> List[str]:
+    """Messages from a ``core.market_data`` recording, or from a newline-delimited file."""
+    try:
+        return [payload.decode() for _, payload in read_records(path)]
+    except ValueError:
+        return load_messages(path)
@@ -0,0 +1,237 @@
+import argparse
+import json
+import math
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from benchmarks.payloads import load_recorded, synthetic_stream
+from core.book_engine import BookUpdate, L2BookEngine
+from core.decoder import available_decoders, get_decoder
+from core.session import AnalyzerSession
+from core.trade_analyzer import (
+    FeeTier, MakerTakerInput, MarketImpactParams, OrderBook, OrderSide, TradeAnalyzer, walk_book
+)
+from core.volatility import RollingVolatility
+
+DEPTHS = (25, 100, 400)
+
+
+class Case:
+    """One benchmark: ``run(i)`` is a single operation, ``ticks`` how many ticks it covers."""
+
+    def __init__(self, name: str, run: Callable[[int], object], ticks: int = 1):
+        self.name = name
+        self.run = run
+        self.ticks = ticks
+
+
+def measure(case: Case, min_time: float, repeat: int) -> Dict[str, float]:
+    run = case.run
+    # Calibrate the inner loop so one repeat takes about min_time
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for i in range(number):
+            run(i)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 10 or number >= 1 << 20:
+            break
+        number *= 4
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for i in range(number):
+            run(i)
+        best = min(best, time.perf_counter() - start)
+    per_op = best / number
+
+    # CPython has no total allocation counter; report peak bytes and live blocks left per op
+    tracemalloc.start()
+    run(0)
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    ops = min(number, 200)
+    for i in range(ops):
+        run(i)
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+
+    return {
+        "us_per_op": per_op * 1e6,
+        "ticks_per_s": case.ticks / per_op,
+        "peak_kib": peak / 1024,
+        "retained_blocks_per_op": retained / ops,
+        "iterations": number,
+    }
+
+
+def depth_cases(label: str, messages: List[str], mk_input: MakerTakerInput,
+                mi_params: MarketImpactParams) -> List[Case]:
+    n = len(messages)
+    cases = []
+    for name in available_decoders():
+        decoder = get_decoder(name)
+        cases.append(Case(f"decode/{name}/{label}", lambda i, d=decoder: d.decode_book(messages[i % n])))
+
+    decoder = get_decoder()
+    updates = [decoder.decode_book(m) for m in messages]
+    parsed = [decoder.loads(m) for m in messages]
+    books = [OrderBook(u.ask_prices, u.ask_sizes, u.bid_prices, u.bid_sizes) for u in updates]
+
+    cases.append(Case(f"book/from_levels/{label}",
+                      lambda i: OrderBook.from_levels(parsed[i % n]["asks"], parsed[i % n]["bids"])))
+    engine = L2BookEngine()
+    cases.append(Case(f"book/engine_snapshot/{label}", lambda i: engine.apply_update(updates[i % n])))
+
+    # Alternately insert and delete one ask in the middle of the book, so every op splices
+    # the side arrays
+    delta_engine = L2BookEngine()
+    delta_engine.apply_update(updates[0])
+    asks = updates[0].ask_prices
+    between = float(asks[len(asks) // 2] + asks[len(asks) // 2 - 1]) / 2 if len(asks) > 1 else 1.0
+    deltas = [BookUpdate("update", ask_prices=np.array([between]), ask_sizes=np.array([size])) for size in (1.0, 0.0)]
+    cases.append(Case(f"book/engine_delta/{label}", lambda i: delta_engine.apply_update(deltas[i & 1])))
+
+    analyzer = TradeAnalyzer(books[0], exchange_name="OKX", fee_tier=FeeTier.TIER1)
+    prices = [b.mid_price() for b in books[:50]]
+    cases.append(Case(f"analyze/{label}", lambda i: analyzer.analyze(
+        books[i % n], 100.0, FeeTier.TIER1, mi_params, mk_input, prices, "OKX")))
+
+    session = AnalyzerSession()
+    cases.append(Case(f"session_tick/{label}", lambda i: session.on_tick(books[i % n])))
+
+    amounts = np.geomspace(10.0, 1e6, 100)
+    cases.append(Case(f"walk_book_100_sizes/{label}",
+                      lambda i: walk_book(books[i % n], amounts, OrderSide.BUY), ticks=100))
+
+    # Full pipeline: decode, book build and analysis per message
+    pipeline_engine = L2BookEngine()
+    pipeline_session = AnalyzerSession()
+
+    def pipeline(i):
+        book = pipeline_engine.apply_update(decoder.decode_book(messages[i % n]))
+        return pipeline_session.on_tick(book)
+
+    cases.append(Case(f"pipeline/{label}", pipeline))
+    return cases
+
+
+def build_cases(messages_by_depth: Dict[str, List[str]]) -> List[Case]:
+    mk_input = MakerTakerInput(is_market_order=True, volatility=0.6, order_book_depth=0.4, time_since_last_trade=0.3)
+    mi_params = MarketImpactParams(eta=0.0001, gamma=0.000025, lambda_=0.05, sigma=0.001)
+    cases = []
+    for label, messages in messages_by_depth.items():
+        cases.extend(depth_cases(label, messages, mk_input, mi_params))
+
+    analyzer = TradeAnalyzer(OrderBook(), exchange_name="OKX", fee_tier=FeeTier.TIER1)
+    rng = np.random.default_rng(0)
+    walk = (95000.0 * np.exp(np.cumsum(rng.normal(0, 1e-4, 10_000)))).tolist()
+    window = walk[:50]
+    cases.append(Case("volatility/full_recompute_50", lambda i: analyzer.compute_volatility(window)))
+    estimator = RollingVolatility(window=50)
+    cases.append(Case("volatility/rolling_50", lambda i: estimator.update(walk[i % len(walk)])))
+
+    amounts = np.linspace(100.0, 1e6, 200)
+    params = [MarketImpactParams(eta=1e-4 * k, gamma=2.5e-5 * k, lambda_=0.05, sigma=0.001) for k in range(1, 5)]
+    grid = len(amounts) * len(FeeTier) * len(params)
+    cases.append(Case("batch_sweep/200x3x4",
+                      lambda i: analyzer.analyze_batch(amounts, list(FeeTier), params, mk_input, 0.001, 0.1),
+                      ticks=grid))
+    return cases
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_suite(args) -> dict:
+    messages_by_depth = {f"depth{d}": synthetic_stream(args.count, depth=d) for d in DEPTHS}
+    for path in args.recorded:
+        messages_by_depth[f"recorded:{path}"] = load_recorded(path)
+
+    results = {}
+    for case in build_cases(messages_by_depth):
+        if args.filter and args.filter not in case.name:
+            continue
+        results[case.name] = measure(case, args.min_time, args.repeat)
+        r = results[case.name]
+        print(f"{case.name:<48} {r['us_per_op']:>11.2f} us/op {r['ticks_per_s']:>14,.0f} ticks/s "
+              f"{r['peak_kib']:>9.1f} KiB peak {r['retained_blocks_per_op']:>7.2f} blk/op")
+
+    return {
+        "meta": {
+            "label": args.label or git_revision(),
+            "git": git_revision(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "decoders": available_decoders(),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline_path: str, current_path: str, threshold: float) -> int:
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(current_path) as f:
+        current = json.load(f)
+    print(f"{'case':<48} {baseline['meta']['label']:>12} {current['meta']['label']:>12} {'ratio':>8}")
+    regressions = 0
+    for name, result in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        ratio = result["us_per_op"] / old["us_per_op"]
+        flag = ""
+        if ratio > 1.0 + threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif ratio < 1.0 - threshold:
+            flag = "  faster"
+        print(f"{name:<48} {old['us_per_op']:>10.2f}us {result['us_per_op']:>10.2f}us {ratio:>8.2f}{flag}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ingestion and analyzer hot paths")
+    parser.add_argument("--output", help="save results as JSON for later --compare")
+    parser.add_argument("--label", help="name for this run (default: git revision)")
+    parser.add_argument("--recorded", action="append", default=[],
+                        help="recorded market data file (recorder format or newline-delimited JSON)")
+    parser.add_argument("--count", type=int, default=64, help="synthetic messages per depth")
+    parser.add_argument("--filter", help="only run cases whose name contains this string")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing repeat")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="compare two saved result files instead of running")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative slowdown reported as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(args.compare[0], args.compare[1], args.threshold))
+
+    report = run_suite(args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved {len(report['results'])} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from core.session import AnalyzerSession
+from core.tick_store import TickStoreReader, record_book
+from core.trade_analyzer import FeeTier, OrderSide, walk_book
+
+NS_PER_S = 1_000_000_000
+
+FILL_DTYPE = np.dtype([
+    ("ts_ns", "<i8"),
+    ("usd_amount", "<f8"),
+    ("mid_price", "<f8"),
+    ("fill_ratio", "<f8"),
+    ("levels", "<i4"),
+    ("realized_slippage", "<f8"),   # Percent from mid, walked through the stored book
+    ("model_slippage", "<f8"),      # Percent, from the regression model
+    ("realized_cost", "<f8"),       # USD: depth-walk cost plus taker fee
+    ("model_cost", "<f8"),          # USD: model slippage plus blended fee plus market impact
+])
+
+
+@dataclass
+class OrderSchedule:
+    """Market orders evaluated against the stored books.
+
+    Every ``interval_s`` seconds (or on every snapshot if 0) each of ``usd_amounts`` is
+    filled against the first book at or after that time.
+    """
+    usd_amounts: Sequence[float] = (100.0, 1_000.0, 10_000.0)
+    side: OrderSide = OrderSide.BUY
+    interval_s: float = 1.0
+    fee_tier: FeeTier = FeeTier.TIER1
+    exchange_name: str = "OKX"
+    symbol: Optional[str] = None    # Selects per-instrument fee overrides
+
+
+@dataclass
+class BacktestResult:
+    fills: np.ndarray                       # FILL_DTYPE rows in time order, then by order size
+    partitions: List["tuple[int, int, int]"] = field(default_factory=list)  # (start_ns, end_ns, rows)
+    elapsed_s: float = 0.0
+
+    def summary(self) -> Dict[float, Dict[str, float]]:
+        """Prediction error per order size: model minus realized, slippage in percent and cost in USD."""
+        summary = {}
+        for amount in np.unique(self.fills["usd_amount"]):
+            rows = self.fills[self.fills["usd_amount"] == amount]
+            slippage_error = rows["model_slippage"] - rows["realized_slippage"]
+            cost_error = rows["model_cost"] - rows["realized_cost"]
+            summary[float(amount)] = {
+                "count": int(rows.size),
+                "fill_ratio": float(rows["fill_ratio"].mean()),
+                "realized_slippage": float(rows["realized_slippage"].mean()),
+                "model_slippage": float(rows["model_slippage"].mean()),
+                "slippage_bias": float(slippage_error.mean()),
+                "slippage_mae": float(np.abs(slippage_error).mean()),
+                "realized_cost": float(rows["realized_cost"].mean()),
+                "model_cost": float(rows["model_cost"].mean()),
+                "cost_bias": float(cost_error.mean()),
+                "cost_rmse": float(np.sqrt((cost_error ** 2).mean())),
+            }
+        return summary
+
+
+def run_window(path: str, start_ns: int, end_ns: int, schedule: OrderSchedule,
+               warmup: int = 50, chunk_records: int = 16384) -> np.ndarray:
+    """Backtest the records with ``start_ns <= ts_ns < end_ns``.
+
+    The ``warmup`` records before the window are fed to the session first so its
+    volatility estimate does not depend on where the range was partitioned.
+    """
+    reader = TickStoreReader(path)
+    ts = reader.timestamps
+    lo = int(np.searchsorted(ts, start_ns, side="left"))
+    hi = int(np.searchsorted(ts, end_ns, side="left"))
+    if lo >= hi:
+        return np.empty(0, dtype=FILL_DTYPE)
+
+    session = AnalyzerSession(exchange_name=schedule.exchange_name, fee_tier=schedule.fee_tier,
+                              symbol=schedule.symbol)
+    analyzer = session.analyzer
+    amounts = np.asarray(schedule.usd_amounts, dtype=np.float64)
+    fee_rate = analyzer.get_taker_fee_percent(schedule.fee_tier)
+    sign = 1.0 if schedule.side == OrderSide.BUY else -1.0
+
+    # Records at which the schedule places orders
+    window_ts = ts[lo:hi]
+    if schedule.interval_s > 0:
+        interval_ns = int(schedule.interval_s * NS_PER_S)
+        first = -(-start_ns // interval_ns) * interval_ns
+        due = np.arange(first, end_ns, interval_ns, dtype=np.int64)
+        order_idx = np.unique(np.searchsorted(window_ts, due, side="left"))
+        order_idx = order_idx[order_idx < window_ts.size] + lo
+    else:
+        order_idx = np.arange(lo, hi)
+    is_order = np.zeros(hi - lo, dtype=bool)
+    is_order[order_idx - lo] = True
+
+    fills = np.empty(order_idx.size * amounts.size, dtype=FILL_DTYPE)
+    row = 0
+    # Stream the mapped file in chunks so only one chunk is paged in at a time
+    for chunk_start in range(max(0, lo - warmup), hi, chunk_records):
+        chunk = reader.records[chunk_start:min(chunk_start + chunk_records, hi)]
+        for offset in range(chunk.size):
+            index = chunk_start + offset
+            record = chunk[offset]
+            book = record_book(record)
+            if book.is_empty():
+                continue
+            session.update_book(book, int(record["ts_ns"]) / NS_PER_S)
+            if index < lo or not is_order[index - lo]:
+                continue
+
+            mid = session.mid_price
+            filled_usd, filled_qty, levels = walk_book(book, amounts, schedule.side)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                avg_price = np.where(filled_qty > 0, filled_usd / filled_qty, mid)
+            realized_slippage = sign * (avg_price - mid) / mid * 100.0
+
+            session.refresh()
+            model = analyzer.analyze_batch(amounts, [schedule.fee_tier], [session.mi_params],
+                                           session.mk_input, session.sigma, session.spread)
+            model_slippage = model.slippage[:, 0, 0]
+            taker_fee = filled_usd * fee_rate  # Charged on what actually filled
+
+            out = fills[row:row + amounts.size]
+            out["ts_ns"] = record["ts_ns"]
+            out["usd_amount"] = amounts
+            out["mid_price"] = mid
+            out["fill_ratio"] = filled_usd / amounts
+            out["levels"] = levels
+            out["realized_slippage"] = realized_slippage
+            out["model_slippage"] = model_slippage
+            out["realized_cost"] = realized_slippage / 100.0 * filled_usd + taker_fee
+            out["model_cost"] = model_slippage / 100.0 * amounts + model.fee[:, 0, 0] + model.market_impact[:, 0, 0]
+            row += amounts.size
+    return fills[:row]
+
+
+def partition(path: str, window_s: float, start_ns: Optional[int] = None,
+              end_ns: Optional[int] = None) -> List["tuple[int, int]"]:
+    """Split the store's time range into consecutive windows aligned to ``window_s``."""
+    reader = TickStoreReader(path)
+    if len(reader) == 0:
+        return []
+    ts = reader.timestamps
+    start_ns = int(ts[0]) if start_ns is None else start_ns
+    end_ns = int(ts[-1]) + 1 if end_ns is None else end_ns
+    window_ns = max(1, int(window_s * NS_PER_S))
+    edges = list(range(start_ns // window_ns * window_ns + window_ns, end_ns, window_ns))
+    bounds = [start_ns] + edges + [end_ns]
+    return [(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if a < b]
+
+
+def run_backtest(path: str, schedule: OrderSchedule, window_s: float = 3600.0,
+                 start_ns: Optional[int] = None, end_ns: Optional[int] = None,
+                 workers: Optional[int] = None, warmup: int = 50) -> BacktestResult:
+    """Backtest ``schedule`` over a tick store, one time window per task.
+
+    Windows run in worker processes and are merged in window order, so the result
+    is the same whatever the number of workers or the order tasks complete in.
+    """
+    started = time.perf_counter()
+    windows = partition(path, window_s, start_ns, end_ns)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(windows) <= 1:
+        parts = [run_window(path, a, b, schedule, warmup) for a, b in windows]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(windows))) as pool:
+            futures = [pool.submit(run_window, path, a, b, schedule, warmup) for a, b in windows]
+            parts = [future.result() for future in futures]
+
+    fills = np.concatenate(parts) if parts else np.empty(0, dtype=FILL_DTYPE)
+    return BacktestResult(
+        fills=fills,
+        partitions=[(a, b, part.size) for (a, b), part in zip(windows, parts)],
+        elapsed_s=time.perf_counter() - started,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest the cost model against stored order books")
+    parser.add_argument("store", help="tick store written by --store")
+    parser.add_argument("--usd", type=float, action="append", help="order size in USD (repeatable)")
+    parser.add_argument("--side", choices=["buy", "sell"], default="buy")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between orders, 0 for every snapshot")
+    parser.add_argument("--fee-tier", type=int, choices=[1, 2, 3], default=1)
+    parser.add_argument("--exchange", default="OKX")
+    parser.add_argument("--symbol", help="instrument, for per-instrument fee overrides")
+    parser.add_argument("--window", type=float, default=3600.0, help="seconds of data per parallel task")
+    parser.add_argument("--workers", type=int, default=0, help="processes (default: one per CPU)")
+    parser.add_argument("--output", help="save per-order rows as .npy or .csv")
+    args = parser.parse_args()
+
+    schedule = OrderSchedule(
+        usd_amounts=args.usd or OrderSchedule.usd_amounts,
+        side=OrderSide.BUY if args.side == "buy" else OrderSide.SELL,
+        interval_s=args.interval,
+        fee_tier=FeeTier(args.fee_tier),
+        exchange_name=args.exchange.upper(),
+        symbol=args.symbol,
+    )
+    result = run_backtest(args.store, schedule, args.window, workers=args.workers or None)
+    print(f"{result.fills.size} orders over {len(result.partitions)} windows in {result.elapsed_s:.2f} s")
+    print(f"{'usd':>12} {'orders':>8} {'fill':>6} {'real slip %':>12} {'model slip %':>13} "
+          f"{'real $':>10} {'model $':>10} {'bias $':>10} {'rmse $':>10}")
+    for amount, row in result.summary().items():
+        print(f"{amount:>12,.0f} {row['count']:>8} {row['fill_ratio']:>6.2f} {row['realized_slippage']:>12.5f} "
+              f"{row['model_slippage']:>13.5f} {row['realized_cost']:>10.4f} {row['model_cost']:>10.4f} "
+              f"{row['cost_bias']:>10.4f} {row['cost_rmse']:>10.4f}")
+
+    if args.output:
+        if args.output.endswith(".csv"):
+            np.savetxt(args.output, result.fills, delimiter=",", header=",".join(FILL_DTYPE.names),
+                       comments="", fmt="%s")
+        else:
+            np.save(args.output, result.fills)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.trade_analyzer import OrderBook, _empty_levels
+
+CHECKSUM_DEPTH = 25
+
+
+@dataclass(eq=False)
+class BookUpdate:
+    """Numeric book message as produced by the schema-aware decoders."""
+    action: str = "snapshot"
+    ask_prices: np.ndarray = field(default_factory=_empty_levels)
+    ask_sizes: np.ndarray = field(default_factory=_empty_levels)
+    bid_prices: np.ndarray = field(default_factory=_empty_levels)
+    bid_sizes: np.ndarray = field(default_factory=_empty_levels)
+    seq_id: Optional[int] = None
+    prev_seq_id: Optional[int] = None
+    checksum: Optional[int] = None
+    timestamp: Optional[float] = None   # Exchange timestamp in ms, when the feed sends one
+    # Original level strings, kept by the decoders only when ``checksum`` is set since the
+    # checksum is defined over them
+    raw_asks: Optional[Sequence] = None
+    raw_bids: Optional[Sequence] = None
+
+
+def _splice_out(array: np.ndarray, drop: List[int]) -> np.ndarray:
+    """``array`` without the ascending indices ``drop``; one concatenate, unlike ``np.delete``."""
+    pieces, start = [], 0
+    for i in drop:
+        pieces.append(array[start:i])
+        start = i + 1
+    pieces.append(array[start:])
+    return np.concatenate(pieces)
+
+
+def _splice_in(array: np.ndarray, at: List[int], values: List[float]) -> np.ndarray:
+    """``array`` with ``values`` inserted before the non-decreasing positions ``at``."""
+    pieces, start = [], 0
+    for i, value in zip(at, values):
+        pieces.append(array[start:i])
+        pieces.append((value,))
+        start = i
+    pieces.append(array[start:])
+    return np.concatenate(pieces)
+
+
+class BookSide:
+    """One side of an L2 book as sorted NumPy price and size arrays.
+
+    A message is applied as one batch: its levels are located with one ``searchsorted``,
+    sizes of existing levels are set on a copy of the size array, and added or removed
+    levels are spliced in with one concatenate per array. Copies are memcpy of the
+    arrays, the Python work scales with the levels in the message only, and the arrays
+    go to the next ``OrderBook`` as they are. Published arrays are never written to, so
+    books already handed out stay valid.
+    """
+
+    def __init__(self, descending: bool):
+        self.descending = descending
+        # Keys are negated prices for bids so both sides search best-first in ascending order
+        self._keys = _empty_levels()
+        self._prices = self._keys
+        self._sizes = _empty_levels()
+        self._raw: Dict[float, Tuple[str, str]] = {}
+
+    def __len__(self) -> int:
+        return self._keys.size
+
+    def clear(self):
+        self._keys = self._prices = _empty_levels()
+        self._sizes = _empty_levels()
+        self._raw.clear()
+
+    def _set_keys(self, keys: np.ndarray, sizes: np.ndarray):
+        self._keys = keys
+        self._prices = -keys if self.descending else keys
+        self._sizes = sizes
+
+    def apply_levels(self, levels: Sequence):
+        """Apply ``[price, size, ...]`` levels, keeping their strings for the checksum."""
+        raw = [(str(level[0]), str(level[1])) for level in levels if len(level) >= 2]
+        if not raw:
+            return
+        prices = [float(price) for price, _ in raw]
+        sizes = [float(size) for _, size in raw]
+        self.apply_arrays(np.array(prices), np.array(sizes))
+        sign = -1.0 if self.descending else 1.0
+        for strings, price, size in zip(raw, prices, sizes):
+            if size > 0.0:
+                self._raw[sign * price] = strings
+            else:
+                self._raw.pop(sign * price, None)
+
+    def _sorted_keys(self, prices: np.ndarray, sizes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Search keys in ascending order with their sizes, the last entry for a price winning."""
+        keys = -prices if self.descending else prices
+        if keys.size > 1:
+            keys, last = np.unique(keys[::-1], return_index=True)
+            sizes = sizes[::-1][last]
+        return keys, sizes
+
+    def apply_arrays(self, prices: np.ndarray, sizes: np.ndarray):
+        if prices.size == 0:
+            return
+        sign = -1.0 if self.descending else 1.0
+        # Deltas touch a handful of levels, so they are sorted out in Python and the book
+        # arrays see at most one copy, delete and insert each
+        levels = sorted((sign * price, size) for price, size in dict(zip(prices.tolist(), sizes.tolist())).items())
+        if self._raw:
+            for key, _ in levels:
+                self._raw.pop(key, None)
+
+        book_keys, book_sizes = self._keys, self._sizes
+        n = book_keys.size
+        idx = book_keys.searchsorted([key for key, _ in levels]).tolist()
+        present = book_keys.take(idx, mode="clip").tolist() if n else [None] * len(levels)
+        set_at, set_to, drop, add_keys, add_sizes = [], [], [], [], []
+        for (key, size), i, current in zip(levels, idx, present):
+            if i < n and current == key:
+                if size > 0.0:
+                    set_at.append(i)
+                    set_to.append(size)
+                else:
+                    drop.append(i)
+            elif size > 0.0:
+                add_keys.append(key)
+                add_sizes.append(size)
+
+        if set_at:
+            book_sizes = book_sizes.copy()
+            book_sizes[set_at] = set_to
+        if not drop and not add_keys:
+            self._sizes = book_sizes
+            return
+        if drop:
+            book_keys = _splice_out(book_keys, drop)
+            book_sizes = _splice_out(book_sizes, drop)
+        if add_keys:
+            at = book_keys.searchsorted(add_keys).tolist()
+            book_keys = _splice_in(book_keys, at, add_keys)
+            book_sizes = _splice_in(book_sizes, at, add_sizes)
+        self._set_keys(book_keys, book_sizes)
+
+    def load_arrays(self, prices: np.ndarray, sizes: np.ndarray):
+        """Replace the side with a snapshot in one pass."""
+        keys, sizes = self._sorted_keys(prices, sizes)
+        keep = sizes > 0.0
+        self._set_keys(keys[keep], sizes[keep])
+        self._raw = {}
+
+    def to_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        return self._prices, self._sizes
+
+    def raw_levels(self, depth: int) -> List[Tuple[str, str]]:
+        # Levels loaded from numeric arrays have no original strings; fall back to repr
+        levels = []
+        for key, price, size in zip(self._keys[:depth].tolist(), self._prices[:depth].tolist(),
+                                    self._sizes[:depth].tolist()):
+            raw = self._raw.get(key)
+            levels.append(raw if raw is not None else (repr(price), repr(size)))
+        return levels
+
+
+class L2BookEngine:
+    """Maintains an L2 book from snapshot-then-delta messages.
+
+    Messages are either flat ``{"asks": ..., "bids": ...}`` dicts or OKX-style envelopes
+    with ``action`` and a ``data`` list. Messages without an ``action`` are treated as
+    full snapshots. The engine starts out, and after a sequence gap or checksum mismatch
+    returns to, ``needs_resync``: deltas are ignored until the next snapshot arrives.
+    """
+
+    def __init__(self, verify_checksum: bool = True):
+        self.verify_checksum = verify_checksum
+        self.asks = BookSide(descending=False)
+        self.bids = BookSide(descending=True)
+        self.seq_id: Optional[int] = None
+        self.version = 0
+        self.needs_resync = True    # Nothing to apply deltas to before the first snapshot
+        self.resync_count = 0
+        self._book: Optional[OrderBook] = None
+
+    def reset(self):
+        self.asks.clear()
+        self.bids.clear()
+        self.seq_id = None
+        self._book = None
+
+    def request_resync(self):
+        if not self.needs_resync:
+            self.resync_count += 1
+        self.needs_resync = True
+        self.reset()
+
+    @staticmethod
+    def _unwrap(message: dict) -> Tuple[str, dict]:
+        if isinstance(message.get("data"), list) and message["data"]:
+            return message.get("action", "snapshot"), message["data"][0]
+        return message.get("action", "snapshot"), message
+
+    def apply_message(self, message: dict) -> Optional[OrderBook]:
+        """Apply a snapshot or delta and return the updated book, or None if out of sync."""
+        action, data = self._unwrap(message)
+        if "asks" not in data and "bids" not in data:
+            return None
+
+        if not self._begin(action, data.get("prevSeqId")):
+            return None
+
+        self.asks.apply_levels(data.get("asks", ()))
+        self.bids.apply_levels(data.get("bids", ()))
+
+        return self._commit(data.get("seqId"), data.get("checksum"))
+
+    def apply_update(self, update: BookUpdate) -> Optional[OrderBook]:
+        """Apply a numerically decoded message.
+
+        Messages carrying a checksum are applied from their original level strings and
+        verified like ``apply_message``. Others are applied from the arrays, snapshots in
+        bulk.
+        """
+        if not self._begin(update.action, update.prev_seq_id):
+            return None
+
+        if update.raw_asks is not None or update.raw_bids is not None:
+            self.asks.apply_levels(update.raw_asks or ())
+            self.bids.apply_levels(update.raw_bids or ())
+        elif update.action == "snapshot":
+            self.asks.load_arrays(update.ask_prices, update.ask_sizes)
+            self.bids.load_arrays(update.bid_prices, update.bid_sizes)
+        else:
+            self.asks.apply_arrays(update.ask_prices, update.ask_sizes)
+            self.bids.apply_arrays(update.bid_prices, update.bid_sizes)
+
+        return self._commit(update.seq_id, update.checksum)
+
+    def _begin(self, action: str, prev_seq_id: Optional[int]) -> bool:
+        if action == "snapshot":
+            self.reset()
+            self.needs_resync = False
+            return True
+        if self.needs_resync:
+            return False
+        if prev_seq_id is not None and self.seq_id is not None and prev_seq_id != self.seq_id:
+            self.request_resync()
+            return False
+        return True
+
+    def _commit(self, seq_id: Optional[int], checksum: Optional[int]) -> Optional[OrderBook]:
+        if self.verify_checksum and checksum is not None and checksum != self.checksum():
+            self.request_resync()
+            return None
+
+        if seq_id is not None:
+            self.seq_id = seq_id
+        self.version += 1
+        self._book = None
+        return self.book()
+
+    def book(self) -> OrderBook:
+        if self._book is None:
+            ask_prices, ask_sizes = self.asks.to_arrays()
+            bid_prices, bid_sizes = self.bids.to_arrays()
+            self._book = OrderBook(ask_prices, ask_sizes, bid_prices, bid_sizes)
+        return self._book
+
+    def checksum(self) -> int:
+        """OKX-style CRC32 over the interleaved top bid/ask levels, as a signed 32-bit int."""
+        bids = self.bids.raw_levels(CHECKSUM_DEPTH)
+        asks = self.asks.raw_levels(CHECKSUM_DEPTH)
+        parts = []
+        for i in range(max(len(bids), len(asks))):
+            if i < len(bids):
+                parts.extend(bids[i])
+            if i < len(asks):
+                parts.extend(asks[i])
+        crc = zlib.crc32(":".join(parts).encode())
+        return crc - (1 << 32) if crc >= (1 << 31) else crc
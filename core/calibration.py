@@ -0,0 +1,269 @@
+import json
+import math
+import os
+import threading
+from dataclasses import replace
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.trade_analyzer import (
+    DEFAULT_MAKER_TAKER, DEFAULT_SLIPPAGE, MakerTakerInput, MakerTakerWeights, OrderBook, OrderSide,
+    SlippageCoefficients, TradeAnalyzer, walk_book
+)
+
+SNAPSHOT_VERSION = 1
+
+
+class RecursiveLeastSquares:
+    """Exponentially weighted recursive least squares, O(n^2) per update for n features."""
+
+    def __init__(self, theta: Sequence[float], forgetting: float = 0.999, delta: float = 100.0,
+                 max_trace: float = 1e6):
+        self.theta = np.array(theta, dtype=np.float64)
+        self.P = np.eye(self.theta.size) * delta
+        self.forgetting = forgetting
+        self.max_trace = max_trace
+        self.updates = 0
+
+    def predict(self, x: np.ndarray) -> float:
+        return float(x @ self.theta)
+
+    def update(self, x: np.ndarray, y: float) -> float:
+        """Fold in one observation and return the prior prediction error."""
+        Px = self.P @ x
+        gain = Px / (self.forgetting + x @ Px)
+        error = y - x @ self.theta
+        self.theta += gain * error
+        self.P -= np.outer(gain, Px)
+        # Only forget while the covariance is bounded, so unexcited directions do not wind up
+        if np.trace(self.P) < self.max_trace:
+            self.P /= self.forgetting
+        self.updates += 1
+        return float(error)
+
+
+class OnlineLogistic:
+    """Logistic regression fitted by stochastic gradient descent with L2 decay."""
+
+    def __init__(self, weights: Sequence[float], learning_rate: float = 0.01, l2: float = 1e-4):
+        self.weights = np.array(weights, dtype=np.float64)
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.updates = 0
+
+    def predict(self, x: np.ndarray) -> float:
+        return 1.0 / (1.0 + math.exp(-float(x @ self.weights)))
+
+    def update(self, x: np.ndarray, label: float) -> float:
+        error = label - self.predict(x)
+        self.weights += self.learning_rate * (error * x - self.l2 * self.weights)
+        self.updates += 1
+        return error
+
+
+def slippage_features(usd_amount: float, volatility: float, spread: float) -> np.ndarray:
+    return np.array([1.0, math.log(usd_amount), volatility, spread])
+
+
+def maker_taker_features(input_data: MakerTakerInput) -> np.ndarray:
+    return np.array([
+        1.0 if input_data.is_market_order else 0.0,
+        input_data.volatility,
+        input_data.order_book_depth,
+        input_data.time_since_last_trade,
+        1.0,
+    ])
+
+
+class ExecutionProbe:
+    """Labels maker/taker executions from the book alone, for feeds without trades.
+
+    A virtual limit order rests at the touch, alternating sides: a buy at the best bid
+    counts as a maker fill once the best ask comes down to its price within
+    ``horizon_s``, and as a taker execution otherwise, since it would then have had to
+    cross. Each resolved probe also yields the market order counterpart, which always
+    takes. One probe per instrument is outstanding at a time.
+    """
+
+    def __init__(self, horizon_s: float = 5.0):
+        self.horizon_s = horizon_s
+        self._input: Optional[MakerTakerInput] = None
+        self._side = OrderSide.BUY
+        self._price = 0.0
+        self._posted = 0.0
+
+    def update(self, order_book: OrderBook, input_data: MakerTakerInput,
+               timestamp: float) -> List[Tuple[MakerTakerInput, bool]]:
+        """Advance the probe with a new book; returns ``(input, was_taker)`` labels."""
+        if order_book.ask_prices.size == 0 or order_book.bid_prices.size == 0:
+            return []
+        best_ask = float(order_book.ask_prices[0])
+        best_bid = float(order_book.bid_prices[0])
+        if self._input is None:
+            self._post(best_ask, best_bid, input_data, timestamp)
+            return []
+
+        if self._side == OrderSide.BUY:
+            filled = best_ask <= self._price
+        else:
+            filled = best_bid >= self._price
+        if not filled and timestamp - self._posted < self.horizon_s:
+            return []
+        limit = self._input
+        labels = [(limit, not filled), (replace(limit, is_market_order=True), True)]
+        self._side = OrderSide.SELL if self._side == OrderSide.BUY else OrderSide.BUY
+        self._post(best_ask, best_bid, input_data, timestamp)
+        return labels
+
+    def _post(self, best_ask: float, best_bid: float, input_data: MakerTakerInput, timestamp: float):
+        self._input = replace(input_data, is_market_order=False)
+        self._price = best_bid if self._side == OrderSide.BUY else best_ask
+        self._posted = timestamp
+
+
+class ExchangeCalibration:
+    """Online estimators for one exchange, mirrored into coefficient objects an analyzer reads."""
+
+    def __init__(self, forgetting: float, learning_rate: float, l2: float):
+        self.slippage = SlippageCoefficients(*DEFAULT_SLIPPAGE.as_tuple())
+        self.maker_taker = MakerTakerWeights(**vars(DEFAULT_MAKER_TAKER))
+        self.slippage_rls = RecursiveLeastSquares(self.slippage.as_tuple(), forgetting=forgetting)
+        self.maker_taker_sgd = OnlineLogistic(
+            [self.maker_taker.w_market, self.maker_taker.w_volatility, self.maker_taker.w_depth,
+             self.maker_taker.w_time, self.maker_taker.bias],
+            learning_rate=learning_rate, l2=l2,
+        )
+
+    def sync(self):
+        s = self.slippage
+        s.beta0, s.beta1, s.beta2, s.beta3 = (float(v) for v in self.slippage_rls.theta)
+        m = self.maker_taker
+        m.w_market, m.w_volatility, m.w_depth, m.w_time, m.bias = (float(v) for v in self.maker_taker_sgd.weights)
+
+    def to_dict(self) -> dict:
+        return {
+            "slippage": {
+                "theta": self.slippage_rls.theta.tolist(),
+                "P": self.slippage_rls.P.tolist(),
+                "updates": self.slippage_rls.updates,
+            },
+            "maker_taker": {
+                "weights": self.maker_taker_sgd.weights.tolist(),
+                "updates": self.maker_taker_sgd.updates,
+            },
+        }
+
+    def restore(self, data: dict):
+        rls = self.slippage_rls
+        rls.theta = np.array(data["slippage"]["theta"], dtype=np.float64)
+        rls.P = np.array(data["slippage"]["P"], dtype=np.float64)
+        rls.updates = int(data["slippage"]["updates"])
+        sgd = self.maker_taker_sgd
+        sgd.weights = np.array(data["maker_taker"]["weights"], dtype=np.float64)
+        sgd.updates = int(data["maker_taker"]["updates"])
+        self.sync()
+
+
+class ModelCalibrator:
+    """Per-exchange online calibration of the slippage and maker/taker models.
+
+    Slippage coefficients are fitted by recursive least squares against the slippage
+    realized by walking the live book at a few probe sizes; maker/taker weights by
+    online logistic regression on executions passed to ``observe_execution``, which
+    sessions label with an ``ExecutionProbe``. Both cost O(1) per tick.
+    ``attach`` points an analyzer at the live coefficient objects, and ``save``/``load``
+    persist the estimator state so a restart resumes where it left off.
+
+    One calibrator is shared by every feed, whose analysis may run on several executor
+    threads, so estimator updates and snapshots are serialized by a lock. Analyzers read
+    the coefficient objects without it and may see one update half applied for a tick.
+    """
+
+    def __init__(self, forgetting: float = 0.999, learning_rate: float = 0.01, l2: float = 1e-4,
+                 probe_sizes: Sequence[float] = (100.0, 1_000.0, 10_000.0)):
+        self.forgetting = forgetting
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.probe_sizes = np.asarray(probe_sizes, dtype=np.float64)
+        self._log_probe_sizes = np.log(self.probe_sizes)
+        self.exchanges: Dict[str, ExchangeCalibration] = {}
+        self._lock = threading.Lock()
+
+    def state(self, exchange: str) -> ExchangeCalibration:
+        state = self.exchanges.get(exchange)
+        if state is None:
+            with self._lock:
+                state = self.exchanges.get(exchange)
+                if state is None:
+                    state = self.exchanges[exchange] = ExchangeCalibration(
+                        self.forgetting, self.learning_rate, self.l2)
+        return state
+
+    def attach(self, analyzer: TradeAnalyzer, exchange: str):
+        state = self.state(exchange)
+        analyzer.slippage_models[exchange] = state.slippage
+        analyzer.maker_taker_models[exchange] = state.maker_taker
+
+    def observe_slippage(self, exchange: str, usd_amount: float, volatility: float, spread: float,
+                         realized_slippage: float) -> float:
+        state = self.state(exchange)
+        with self._lock:
+            error = state.slippage_rls.update(slippage_features(usd_amount, volatility, spread), realized_slippage)
+            state.sync()
+        return error
+
+    def observe_book(self, exchange: str, order_book: OrderBook, volatility: float, spread: float,
+                     side: OrderSide = OrderSide.BUY):
+        """Fit slippage to the depth-walked fills of each probe size on this book."""
+        mid = order_book.mid_price()
+        if mid <= 0.0:
+            return
+        filled_usd, filled_qty, _ = walk_book(order_book, self.probe_sizes, side)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            avg_price = np.where(filled_qty > 0, filled_usd / filled_qty, mid)
+        sign = 1.0 if side == OrderSide.BUY else -1.0
+        realized = sign * (avg_price - mid) / mid * 100.0
+        state = self.state(exchange)
+        rls = state.slippage_rls
+        with self._lock:
+            for log_size, y in zip(self._log_probe_sizes, realized):
+                rls.update(np.array([1.0, log_size, volatility, spread]), float(y))
+            state.sync()
+
+    def observe_execution(self, exchange: str, input_data: MakerTakerInput, was_taker: bool) -> float:
+        state = self.state(exchange)
+        with self._lock:
+            error = state.maker_taker_sgd.update(maker_taker_features(input_data), 1.0 if was_taker else 0.0)
+            state.sync()
+        return error
+
+    def maker_taker_updates(self, exchange: str) -> int:
+        return self.state(exchange).maker_taker_sgd.updates
+
+    def save(self, path: str):
+        """Write a JSON snapshot atomically, so a crash mid-write keeps the previous one."""
+        with self._lock:
+            snapshot = {
+                "version": SNAPSHOT_VERSION,
+                "exchanges": {name: state.to_dict() for name, state in self.exchanges.items()},
+            }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> bool:
+        """Restore a snapshot written by ``save``; returns False if there is none yet."""
+        if not os.path.exists(path):
+            return False
+        with open(path) as f:
+            snapshot = json.load(f)
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"{path} is not a version {SNAPSHOT_VERSION} calibration snapshot")
+        for name, data in snapshot["exchanges"].items():
+            state = self.state(name)
+            with self._lock:
+                state.restore(data)
+        return True
+
@@ -0,0 +1,177 @@
+import argparse
+import asyncio
+import csv
+import json
+import sys
+import time
+from typing import Dict, List
+
+from core.calibration import ModelCalibrator
+from core.feed_manager import FeedKey, FeedManager, FeedUpdate, PipelineConfig, QueuePolicy
+from core.fees import fee_registry
+from core.market_data import ReplaySource
+from core.trade_analyzer import FeeTier
+
+COLUMNS = (
+    "recv_time_ns", "exchange", "symbol", "best_ask", "best_bid", "slippage", "fee",
+    "market_impact", "net_cost", "maker_prob", "taker_prob", "processing_ms",
+)
+
+
+def positive_int(text: str) -> int:
+    """argparse type for counts that must be at least 1."""
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {text}")
+    return value
+
+
+def assign_replays(feeds: List[FeedKey], replays: List[str]) -> Dict[FeedKey, str]:
+    """Map each feed to its own recording.
+
+    A replay is either ``EXCHANGE:SYMBOL=PATH`` or a plain path, which goes to the feed at
+    the same position. Every feed needs exactly one, so no two venues replay one file.
+    """
+    assigned: Dict[FeedKey, str] = {}
+    positional = []
+    for replay in replays:
+        target, sep, path = replay.partition("=")
+        try:
+            key = FeedKey.parse(target) if sep else None
+        except ValueError:
+            key = None
+        if key is None:
+            positional.append(replay)
+        elif key in assigned:
+            raise ValueError(f"more than one --replay for {key}")
+        else:
+            assigned[key] = path
+    unknown = [str(key) for key in assigned if key not in feeds]
+    if unknown:
+        raise ValueError(f"--replay for {', '.join(unknown)}, which is not a --feed")
+    unassigned = [key for key in feeds if key not in assigned]
+    if len(positional) != len(unassigned):
+        raise ValueError(f"{len(feeds)} feeds need one --replay each, got {len(replays)}")
+    assigned.update(zip(unassigned, positional))
+    return assigned
+
+
+def update_row(update: FeedUpdate) -> tuple:
+    result = update.result
+    book = update.order_book
+    return (
+        update.trace.recv_wall_ns,
+        update.key.exchange,
+        update.key.symbol,
+        float(book.ask_prices[0]),
+        float(book.bid_prices[0]),
+        result.slippage,
+        result.fee,
+        result.market_impact,
+        result.net_cost,
+        result.maker_taker_result.maker_prob,
+        result.maker_taker_result.taker_prob,
+        update.processing_latency_ms,
+    )
+
+
+async def run(args) -> int:
+    calibrator = None
+    if args.calibration:
+        calibrator = ModelCalibrator()
+        if calibrator.load(args.calibration):
+            print(f"Restored calibration from {args.calibration}", file=sys.stderr)
+    pipeline = PipelineConfig(
+        policy=QueuePolicy(args.policy),
+        queue_size=args.queue_size,
+        sample_every=args.sample_every,
+        compute_workers=args.compute_workers,
+    )
+    fees = fee_registry(args.fees) if args.fees else None
+    manager = FeedManager(decoder=args.decoder, calibrator=calibrator, shm_prefix=args.shm, pipeline=pipeline,
+                          fees=fees)
+    fee_tier = FeeTier(args.fee_tier)
+    for key in args.feeds:
+        source = None
+        if args.replays:
+            source = ReplaySource(args.replays[key], speed=args.speed or None)
+        manager.add_feed(key.exchange, key.symbol, source=source, usd_amount=args.usd,
+                         fee_tier=fee_tier, volatility=args.volatility,
+                         record_path=args.record, tick_store_path=args.store)
+
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    writer = csv.writer(out) if args.format == "csv" and not args.quiet else None
+    if writer is not None:
+        writer.writerow(COLUMNS)
+
+    count = 0
+    start = time.perf_counter()
+    try:
+        async for update in manager.stream():
+            if writer is not None:
+                writer.writerow(update_row(update))
+            elif not args.quiet:
+                out.write(json.dumps(dict(zip(COLUMNS, update_row(update)))) + "\n")
+            count += 1
+            if args.limit and count >= args.limit:
+                break
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if calibrator is not None:
+            calibrator.save(args.calibration)
+
+    elapsed = time.perf_counter() - start
+    print(f"{count} results in {elapsed:.3f} s ({count / elapsed if elapsed else 0.0:.0f} ticks/s)", file=sys.stderr)
+    for key in manager.feeds:
+        q = manager.queue_stats(key)
+        print(f"{key}: {q.received} books, {q.processed} analyzed, {q.dropped} dropped, "
+              f"max queue {q.max_depth}, max wait {q.max_wait_ms:.2f} ms", file=sys.stderr)
+    if args.latency:
+        manager.latency.export(args.latency)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless trade cost simulator (no Qt)")
+    parser.add_argument("--feed", action="append", default=[], metavar="EXCHANGE:SYMBOL",
+                        help="instrument to track (repeatable, default OKX:BTC-USDT-SWAP)")
+    parser.add_argument("--replay", action="append", default=[], metavar="[EXCHANGE:SYMBOL=]PATH",
+                        help="recorded market data file instead of the live feed, one per --feed")
+    parser.add_argument("--speed", type=float, default=0.0, help="replay pace multiplier, 0 for as fast as possible")
+    parser.add_argument("--usd", type=float, default=100.0, help="order size in USD")
+    parser.add_argument("--fee-tier", type=int, choices=[1, 2, 3], default=1)
+    parser.add_argument("--volatility", type=float, default=0.6)
+    parser.add_argument("--fees", help="fee schedule config (JSON) instead of the bundled core/fee_schedules.json")
+    parser.add_argument("--decoder", default="auto")
+    parser.add_argument("--policy", choices=[p.value for p in QueuePolicy], default=QueuePolicy.PROCESS_ALL.value,
+                        help="books to analyze when compute falls behind: all, latest only, or every Nth")
+    parser.add_argument("--sample-every", type=positive_int, default=1, help="N for --policy sample")
+    parser.add_argument("--queue-size", type=positive_int, default=256, help="books buffered between receive and compute")
+    parser.add_argument("--compute-workers", type=int, default=1, help="analysis threads, 0 to analyze on the event loop")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    parser.add_argument("--output", help="write results to this file instead of stdout")
+    parser.add_argument("--quiet", action="store_true", help="do not write per-tick results")
+    parser.add_argument("--limit", type=int, default=0, help="stop after this many results")
+    parser.add_argument("--record", help="record received messages to this file")
+    parser.add_argument("--store", help="append snapshots and costs to this tick store")
+    parser.add_argument("--shm", metavar="PREFIX",
+                        help="publish each feed's latest costs to a shared memory ring named PREFIX_EXCHANGE_SYMBOL")
+    parser.add_argument("--calibration", help="calibrate model coefficients online, restoring from and saving to this file")
+    parser.add_argument("--latency", help="export latency histograms here on exit (.json or .csv)")
+    args = parser.parse_args()
+    if (args.record or args.store) and len(args.feed) > 1:
+        parser.error("--record and --store take a single --feed")
+    try:
+        args.feeds = list(dict.fromkeys(map(FeedKey.parse, args.feed))) or [FeedKey("OKX", "BTC-USDT-SWAP")]
+        args.replays = assign_replays(args.feeds, args.replay) if args.replay else {}
+    except ValueError as e:
+        parser.error(str(e))
+    try:
+        sys.exit(asyncio.run(run(args)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
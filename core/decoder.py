@@ -0,0 +1,149 @@
+import json
+from typing import Callable, Dict, List, Optional, Union
+
+from core.book_engine import BookUpdate
+from core.trade_analyzer import levels_to_arrays
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+Message = Union[str, bytes]
+
+
+def _optional_int(value) -> Optional[int]:
+    return None if value is None else int(value)
+
+
+def _optional_float(value) -> Optional[float]:
+    return None if value is None else float(value)
+
+
+class MessageDecoder:
+    """Decodes raw feed messages, either to a dict or straight to a numeric ``BookUpdate``."""
+
+    name = "json"
+
+    def loads(self, message: Message) -> dict:
+        return json.loads(message)
+
+    def decode_book(self, message: Message) -> Optional[BookUpdate]:
+        return self.book_from_dict(self.loads(message))
+
+    @staticmethod
+    def book_from_dict(data: dict) -> Optional[BookUpdate]:
+        action = data.get("action", "snapshot")
+        if isinstance(data.get("data"), list) and data["data"]:
+            data = data["data"][0]
+        if "asks" not in data and "bids" not in data:
+            return None
+        asks, bids = data.get("asks", ()), data.get("bids", ())
+        checksum = _optional_int(data.get("checksum"))
+        ask_prices, ask_sizes = levels_to_arrays(asks)
+        bid_prices, bid_sizes = levels_to_arrays(bids)
+        return BookUpdate(
+            action=action,
+            ask_prices=ask_prices,
+            ask_sizes=ask_sizes,
+            bid_prices=bid_prices,
+            bid_sizes=bid_sizes,
+            seq_id=_optional_int(data.get("seqId")),
+            prev_seq_id=_optional_int(data.get("prevSeqId")),
+            checksum=checksum,
+            timestamp=_optional_float(data.get("ts")),
+            raw_asks=asks if checksum is not None else None,
+            raw_bids=bids if checksum is not None else None,
+        )
+
+
+class OrjsonDecoder(MessageDecoder):
+    name = "orjson"
+
+    def loads(self, message: Message) -> dict:
+        return orjson.loads(message)
+
+
+class MsgspecDecoder(MessageDecoder):
+    """Uses a typed msgspec schema so numeric strings are converted while parsing."""
+
+    name = "msgspec"
+
+    def __init__(self):
+        class _Book(msgspec.Struct):
+            asks: List[List[float]] = []
+            bids: List[List[float]] = []
+            seqId: Optional[int] = None
+            prevSeqId: Optional[int] = None
+            checksum: Optional[int] = None
+            ts: Optional[float] = None
+
+        class _Envelope(msgspec.Struct):
+            action: str = "snapshot"
+            data: Optional[List[_Book]] = None
+            asks: List[List[float]] = []
+            bids: List[List[float]] = []
+            seqId: Optional[int] = None
+            prevSeqId: Optional[int] = None
+            checksum: Optional[int] = None
+            ts: Optional[float] = None
+
+        self._decoder = msgspec.json.Decoder(_Envelope, strict=False)
+        self._generic = msgspec.json.Decoder()
+
+    def loads(self, message: Message) -> dict:
+        return self._generic.decode(message)
+
+    def decode_book(self, message: Message) -> Optional[BookUpdate]:
+        try:
+            envelope = self._decoder.decode(message)
+        except msgspec.ValidationError:
+            # Messages outside the book schema (acks, errors) go through the generic path
+            return self.book_from_dict(self.loads(message))
+        book = envelope.data[0] if envelope.data else envelope
+        if not book.asks and not book.bids:
+            return None
+        if book.checksum is not None:
+            # The typed schema has already turned the levels into floats, but the checksum
+            # is verified over the original strings
+            return self.book_from_dict(self.loads(message))
+        ask_prices, ask_sizes = levels_to_arrays(book.asks)
+        bid_prices, bid_sizes = levels_to_arrays(book.bids)
+        return BookUpdate(
+            action=envelope.action,
+            ask_prices=ask_prices,
+            ask_sizes=ask_sizes,
+            bid_prices=bid_prices,
+            bid_sizes=bid_sizes,
+            seq_id=book.seqId,
+            prev_seq_id=book.prevSeqId,
+            checksum=book.checksum,
+            timestamp=book.ts,
+        )
+
+
+DECODERS: Dict[str, Callable[[], MessageDecoder]] = {"json": MessageDecoder}
+if orjson is not None:
+    DECODERS["orjson"] = OrjsonDecoder
+if msgspec is not None:
+    DECODERS["msgspec"] = MsgspecDecoder
+
+# Preference order for "auto"
+_AUTO_ORDER = ("msgspec", "orjson", "json")
+
+
+def available_decoders() -> List[str]:
+    return [name for name in _AUTO_ORDER if name in DECODERS]
+
+
+def get_decoder(name: str = "auto") -> MessageDecoder:
+    if name == "auto":
+        name = available_decoders()[0]
+    if name not in DECODERS:
+        raise ValueError(f"Unknown or unavailable decoder: {name} (available: {', '.join(available_decoders())})")
+    return DECODERS[name]()
@@ -0,0 +1,219 @@
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Optional, Sequence
+
+import numpy as np
+
+from core.trade_analyzer import MarketImpactParams
+
+PERCENTILES = (5.0, 50.0, 95.0, 99.0)
+
+
+@dataclass
+class ExecutionSchedule:
+    """Almgren-Chriss holdings ``x_0 .. x_N`` and the trade list ``n_k = x_{k-1} - x_k``."""
+    quantity: float
+    horizon: float
+    steps: int
+    kappa: float
+    holdings: np.ndarray
+    trades: np.ndarray
+
+    @property
+    def tau(self) -> float:
+        return self.horizon / self.steps
+
+
+def optimal_schedule(quantity: float, params: MarketImpactParams, horizon: float = 1.0,
+                     steps: int = 20) -> ExecutionSchedule:
+    """Risk-averse optimal liquidation trajectory for linear impact.
+
+    ``params.sigma`` is the price volatility per unit of ``horizon``. With no risk
+    aversion the schedule degenerates to TWAP.
+    """
+    if steps < 1 or horizon <= 0:
+        raise ValueError("steps and horizon must be positive")
+    tau = horizon / steps
+    eta_tilde = params.eta - 0.5 * params.gamma * tau
+    if eta_tilde <= 0:
+        raise ValueError("eta must exceed gamma * tau / 2 for the schedule to be well defined")
+
+    t = np.arange(steps + 1) * tau
+    kappa_tilde_sq = params.lambda_ * params.sigma ** 2 / eta_tilde
+    if kappa_tilde_sq * horizon ** 2 < 1e-12:
+        kappa = 0.0
+        holdings = quantity * (1.0 - t / horizon)
+    else:
+        kappa = math.acosh(0.5 * kappa_tilde_sq * tau ** 2 + 1.0) / tau
+        # sinh(kappa (T - t)) / sinh(kappa T), written with exponentials so large kappa*T does not overflow
+        holdings = quantity * np.exp(-kappa * t) * -np.expm1(-2 * kappa * (horizon - t)) / -np.expm1(-2 * kappa * horizon)
+    holdings[-1] = 0.0
+    return ExecutionSchedule(quantity, horizon, steps, kappa, holdings, -np.diff(holdings))
+
+
+def expected_shortfall(schedule: ExecutionSchedule, params: MarketImpactParams) -> "tuple[float, float]":
+    """Closed-form mean and variance of implementation shortfall for ``schedule``."""
+    tau = schedule.tau
+    eta_tilde = params.eta - 0.5 * params.gamma * tau
+    mean = 0.5 * params.gamma * schedule.quantity ** 2 + eta_tilde / tau * float(schedule.trades @ schedule.trades)
+    holdings = schedule.holdings[1:]
+    variance = params.sigma ** 2 * tau * float(holdings @ holdings)
+    return mean, variance
+
+
+def simulate_paths(schedule: ExecutionSchedule, params: MarketImpactParams, n_paths: int,
+                   rng: np.random.Generator, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Implementation shortfall of ``schedule`` on ``n_paths`` arithmetic Brownian price paths.
+
+    Prices are relative to the arrival price. Each step, the fill price is the previous
+    mid less temporary impact ``eta * n_k / tau``, and the mid moves by a Gaussian shock
+    less permanent impact ``gamma * n_k``.
+    """
+    tau = schedule.tau
+    trades = schedule.trades
+    if out is None:
+        out = np.empty(n_paths)
+
+    # Diffusion term: -sigma sqrt(tau) * sum_k xi_k x_k, one row per path
+    shocks = rng.standard_normal((n_paths, schedule.steps))
+    np.matmul(shocks, schedule.holdings[1:], out=out)
+    out *= -params.sigma * math.sqrt(tau)
+
+    # Impact terms are path independent
+    permanent = params.gamma * float(trades @ (schedule.quantity - schedule.holdings[:-1]))
+    temporary = params.eta / tau * float(trades @ trades)
+    out += permanent + temporary
+    return out
+
+
+def _simulate_batch(shm_name: str, total: int, start: int, stop: int, seed: np.random.SeedSequence,
+                    schedule: ExecutionSchedule, params: MarketImpactParams):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        results = np.ndarray((total,), dtype=np.float64, buffer=shm.buf)
+        simulate_paths(schedule, params, stop - start, np.random.default_rng(seed), out=results[start:stop])
+        del results
+    finally:
+        shm.close()
+
+
+@dataclass
+class ShortfallDistribution:
+    schedule: ExecutionSchedule
+    shortfalls: np.ndarray
+    expected_mean: float
+    expected_std: float
+    elapsed_s: float
+
+    @property
+    def mean(self) -> float:
+        return float(self.shortfalls.mean())
+
+    @property
+    def std(self) -> float:
+        return float(self.shortfalls.std())
+
+    def percentiles(self, percentiles: Sequence[float] = PERCENTILES) -> np.ndarray:
+        return np.percentile(self.shortfalls, percentiles)
+
+    def conditional_tail(self, level: float = 95.0) -> float:
+        """Mean shortfall beyond the ``level`` percentile."""
+        cutoff = np.percentile(self.shortfalls, level)
+        return float(self.shortfalls[self.shortfalls >= cutoff].mean())
+
+
+class MonteCarloSimulator:
+    """Shortfall distribution of Almgren-Chriss schedules over many simulated price paths.
+
+    Paths are split into fixed-size batches, each seeded from its own child of one
+    ``SeedSequence``, so results are identical for any number of workers. Batches run
+    in a process pool and write straight into a shared-memory result array.
+    """
+
+    def __init__(self, workers: Optional[int] = None, batch_size: int = 10_000, seed: Optional[int] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.seed = seed
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def run(self, quantity: float, params: MarketImpactParams, n_paths: int = 100_000,
+            horizon: float = 1.0, steps: int = 20) -> ShortfallDistribution:
+        start_time = time.perf_counter()
+        schedule = optimal_schedule(quantity, params, horizon, steps)
+        bounds = [(i, min(i + self.batch_size, n_paths)) for i in range(0, n_paths, self.batch_size)]
+        seeds = np.random.SeedSequence(self.seed).spawn(len(bounds))
+
+        if self.workers == 1 or len(bounds) == 1:
+            shortfalls = np.empty(n_paths)
+            for (lo, hi), seed in zip(bounds, seeds):
+                simulate_paths(schedule, params, hi - lo, np.random.default_rng(seed), out=shortfalls[lo:hi])
+        else:
+            shm = shared_memory.SharedMemory(create=True, size=max(n_paths, 1) * 8)
+            try:
+                pool = self._executor()
+                futures = [
+                    pool.submit(_simulate_batch, shm.name, n_paths, lo, hi, seed, schedule, params)
+                    for (lo, hi), seed in zip(bounds, seeds)
+                ]
+                for future in futures:
+                    future.result()
+                shortfalls = np.ndarray((n_paths,), dtype=np.float64, buffer=shm.buf).copy()
+            finally:
+                shm.close()
+                shm.unlink()
+
+        mean, variance = expected_shortfall(schedule, params)
+        return ShortfallDistribution(schedule, shortfalls, mean, math.sqrt(variance),
+                                     time.perf_counter() - start_time)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo implementation shortfall of Almgren-Chriss schedules")
+    parser.add_argument("--quantity", type=float, default=1000.0)
+    parser.add_argument("--paths", type=int, default=100_000)
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--horizon", type=float, default=1.0)
+    parser.add_argument("--eta", type=float, default=0.0001)
+    parser.add_argument("--gamma", type=float, default=0.000025)
+    parser.add_argument("--lambda", dest="lambda_", type=float, default=0.05)
+    parser.add_argument("--sigma", type=float, default=0.3)
+    parser.add_argument("--workers", type=int, default=0, help="processes (default: one per CPU)")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    params = MarketImpactParams(eta=args.eta, gamma=args.gamma, lambda_=args.lambda_, sigma=args.sigma)
+    with MonteCarloSimulator(workers=args.workers or None, seed=args.seed) as simulator:
+        dist = simulator.run(args.quantity, params, args.paths, args.horizon, args.steps)
+
+    print(f"{args.paths} paths x {args.steps} steps in {dist.elapsed_s:.2f} s on {simulator.workers} workers")
+    print(f"kappa: {dist.schedule.kappa:.4f}")
+    print(f"shortfall mean: {dist.mean:.6f} (closed form {dist.expected_mean:.6f})")
+    print(f"shortfall std:  {dist.std:.6f} (closed form {dist.expected_std:.6f})")
+    for p, value in zip(PERCENTILES, dist.percentiles()):
+        print(f"p{p:g}: {value:.6f}")
+    print(f"tail mean beyond p95: {dist.conditional_tail(95.0):.6f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import time
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+
+from core.trade_analyzer import OrderBook
+
+DEFAULT_BANDS_BPS = (5.0, 10.0, 25.0)
+
+
+@dataclass(slots=True)
+class BookFeatures:
+    version: int
+    mid_price: float
+    spread: float
+    spread_bps: float
+    microprice: float               # Top-of-book size-weighted mid
+    imbalance: float                # (bid - ask) / (bid + ask) top-of-book size, in [-1, 1]
+    bands_bps: np.ndarray
+    bid_depth_usd: np.ndarray       # Notional within each band of mid
+    ask_depth_usd: np.ndarray
+    bid_levels_within: np.ndarray   # Level count within each band of mid
+    ask_levels_within: np.ndarray
+    bid_levels: int
+    ask_levels: int
+    time_since_change: float        # Seconds since the book contents last changed
+
+    def depth_usd(self, band: int = 0) -> float:
+        return float(self.bid_depth_usd[band] + self.ask_depth_usd[band])
+
+    @property
+    def depth_imbalance(self) -> np.ndarray:
+        """Per band, like ``imbalance`` but on notional."""
+        total = self.bid_depth_usd + self.ask_depth_usd
+        return np.divide(self.bid_depth_usd - self.ask_depth_usd, total, out=np.zeros_like(total), where=total > 0)
+
+
+def _depth_within(sorted_prices: np.ndarray, cum_notional: np.ndarray,
+                  limits: np.ndarray) -> "tuple[np.ndarray, np.ndarray]":
+    # ``sorted_prices`` ascending; bids are passed negated along with negated limits
+    counts = sorted_prices.searchsorted(limits, side="right")
+    notional = cum_notional[counts - 1] * (counts > 0)
+    return notional, counts
+
+
+def compute_features(order_book: OrderBook, bands_bps: np.ndarray, version: int = 0,
+                     time_since_change: float = 0.0) -> BookFeatures:
+    """Book-derived features; all bands are resolved with one binary search per side."""
+    offsets = bands_bps * 1e-4
+    return _compute_features(order_book, bands_bps, 1.0 + offsets, offsets - 1.0, version, time_since_change)
+
+
+def _compute_features(order_book: OrderBook, bands_bps: np.ndarray, ask_limits: np.ndarray,
+                      bid_limits: np.ndarray, version: int, time_since_change: float) -> BookFeatures:
+    if order_book.is_empty():
+        zeros = np.zeros(bands_bps.size)
+        counts = np.zeros(bands_bps.size, dtype=np.int64)
+        return BookFeatures(version, 0.0, 0.0, 0.0, 0.0, 0.0, bands_bps, zeros, zeros, counts, counts,
+                            int(order_book.bid_prices.size), int(order_book.ask_prices.size), time_since_change)
+
+    best_ask = float(order_book.ask_prices[0])
+    best_bid = float(order_book.bid_prices[0])
+    ask_size = float(order_book.ask_sizes[0])
+    bid_size = float(order_book.bid_sizes[0])
+    mid = (best_ask + best_bid) / 2.0
+    spread = best_ask - best_bid
+    top_size = bid_size + ask_size
+    microprice = (best_ask * bid_size + best_bid * ask_size) / top_size if top_size > 0 else mid
+    imbalance = (bid_size - ask_size) / top_size if top_size > 0 else 0.0
+
+    ask_depth, ask_counts = _depth_within(order_book.ask_prices, order_book.ask_depth[1], mid * ask_limits)
+    bid_depth, bid_counts = _depth_within(-order_book.bid_prices, order_book.bid_depth[1], mid * bid_limits)
+
+    return BookFeatures(
+        version=version,
+        mid_price=mid,
+        spread=spread,
+        spread_bps=spread / mid * 10_000.0,
+        microprice=microprice,
+        imbalance=imbalance,
+        bands_bps=bands_bps,
+        bid_depth_usd=bid_depth,
+        ask_depth_usd=ask_depth,
+        bid_levels_within=bid_counts,
+        ask_levels_within=ask_counts,
+        bid_levels=int(order_book.bid_prices.size),
+        ask_levels=int(order_book.ask_prices.size),
+        time_since_change=time_since_change,
+    )
+
+
+class FeatureCache:
+    """Features of the latest book, computed at most once per book version.
+
+    Slippage, maker/taker and display code all read ``get()``, so a tick pays for
+    one feature computation however many consumers there are.
+    """
+
+    def __init__(self, bands_bps: Sequence[float] = DEFAULT_BANDS_BPS, compare_levels: int = 20):
+        self.bands_bps = np.asarray(bands_bps, dtype=np.float64)
+        # Band edges as multiples of mid; bids are searched negated
+        self._ask_limits = 1.0 + self.bands_bps * 1e-4
+        self._bid_limits = self.bands_bps * 1e-4 - 1.0
+        self.compare_levels = compare_levels
+        self._features: Optional[BookFeatures] = None
+        self._book: Optional[OrderBook] = None
+        self._last_change: Optional[float] = None
+
+    def _changed(self, order_book: OrderBook) -> bool:
+        previous = self._book
+        if previous is None or previous.is_empty() or order_book.is_empty():
+            return True
+        if (previous.ask_prices is order_book.ask_prices and previous.ask_sizes is order_book.ask_sizes
+                and previous.bid_prices is order_book.bid_prices and previous.bid_sizes is order_book.bid_sizes):
+            return False
+        if (previous.ask_prices[0] != order_book.ask_prices[0] or previous.bid_prices[0] != order_book.bid_prices[0]
+                or previous.ask_sizes[0] != order_book.ask_sizes[0]
+                or previous.bid_sizes[0] != order_book.bid_sizes[0]):
+            return True
+        n = self.compare_levels
+        return not (
+            np.array_equal(previous.ask_prices[:n], order_book.ask_prices[:n])
+            and np.array_equal(previous.ask_sizes[:n], order_book.ask_sizes[:n])
+            and np.array_equal(previous.bid_prices[:n], order_book.bid_prices[:n])
+            and np.array_equal(previous.bid_sizes[:n], order_book.bid_sizes[:n])
+        )
+
+    def update(self, order_book: OrderBook, version: int, timestamp: Optional[float] = None) -> BookFeatures:
+        features = self._features
+        if features is not None and features.version == version:
+            return features
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        if order_book is not self._book and self._changed(order_book):
+            self._last_change = timestamp
+        self._book = order_book
+        since = timestamp - self._last_change if self._last_change is not None else 0.0
+        self._features = _compute_features(order_book, self.bands_bps, self._ask_limits, self._bid_limits,
+                                           version, since)
+        return self._features
+
+    def get(self) -> Optional[BookFeatures]:
+        return self._features
+
+    def reset(self):
+        self._features = None
+        self._book = None
+        self._last_change = None
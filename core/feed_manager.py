@@ -0,0 +1,474 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from enum import Enum
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from core.book_engine import L2BookEngine
+from core.calibration import ModelCalibrator
+from core.decoder import get_decoder
+from core.features import BookFeatures
+from core.fees import FeeRegistry
+from core.latency import LatencyRecorder, TickTrace
+from core.market_data import ConnectionStats, MessageRecorder, WebSocketSource
+from core.session import AnalyzerSession
+from core.shared_ring import SharedRingWriter, ring_name
+from core.tick_store import TickStoreWriter
+from core.trade_analyzer import FeeTier, OrderBook, TradeCostResult
+
+GOMARKET_HOST = "ws.gomarket-cpp.goquant.io"
+
+
+def gomarket_uri(exchange: str, symbol: str) -> str:
+    return f"wss://{GOMARKET_HOST}:443/ws/l2-orderbook/{exchange.lower()}/{symbol}"
+
+
+@dataclass(frozen=True)
+class FeedKey:
+    exchange: str
+    symbol: str
+
+    def __str__(self) -> str:
+        return f"{self.exchange}:{self.symbol}"
+
+    @classmethod
+    def parse(cls, text: str) -> "FeedKey":
+        exchange, _, symbol = text.partition(":")
+        if not symbol:
+            raise ValueError(f"Expected EXCHANGE:SYMBOL, got {text!r}")
+        return cls(exchange.upper(), symbol)
+
+
+@dataclass(slots=True)
+class FeedUpdate:
+    key: FeedKey
+    order_book: OrderBook
+    result: TradeCostResult
+    recv_time: float
+    interarrival_ms: float          # Gap since the previous message on this feed
+    processing_latency_ms: float    # Receive to analysis complete
+    trace: TickTrace
+    features: Optional[BookFeatures] = None
+
+
+Subscriber = Callable[[FeedUpdate], None]
+
+
+class QueuePolicy(Enum):
+    PROCESS_ALL = "all"         # Every book is analyzed; a full queue pushes back on the receiver
+    LATEST_ONLY = "latest"      # Pending books are replaced by the newest one
+    SAMPLE = "sample"           # Every Nth book is queued; the oldest is dropped when full
+
+
+@dataclass
+class PipelineConfig:
+    """How received books are handed from the receive task to the compute stage."""
+    policy: QueuePolicy = QueuePolicy.PROCESS_ALL
+    queue_size: int = 256
+    sample_every: int = 1
+    compute_workers: int = 1    # Analysis threads shared by all feeds; 0 runs it on the event loop
+
+    def __post_init__(self):
+        if self.queue_size < 1:
+            raise ValueError(f"queue_size must be at least 1, got {self.queue_size}")
+        if self.sample_every < 1:
+            raise ValueError(f"sample_every must be at least 1, got {self.sample_every}")
+        if self.compute_workers < 0:
+            raise ValueError(f"compute_workers cannot be negative, got {self.compute_workers}")
+
+
+@dataclass
+class QueueStats:
+    received: int = 0           # Books built by the receive task
+    enqueued: int = 0
+    dropped: int = 0            # Replaced, sampled out or evicted before analysis
+    processed: int = 0
+    depth: int = 0
+    max_depth: int = 0
+    last_wait_ms: float = 0.0   # Time the last analyzed book spent queued
+    max_wait_ms: float = 0.0
+    resyncs: int = 0            # Times the book went out of sync and a fresh snapshot was requested
+
+
+# Built book, its trace and the gap since the previous message
+PendingBook = Tuple[OrderBook, TickTrace, float]
+
+
+class FeedState:
+    """Book, analyzer session and optional persistence for one subscribed instrument."""
+
+    def __init__(self, key: FeedKey, source, session: AnalyzerSession, decoder,
+                 record_path: Optional[str] = None, tick_store_path: Optional[str] = None,
+                 shm_name: Optional[str] = None):
+        self.key = key
+        self.source = source
+        self.session = session
+        self.decoder = decoder
+        self.book_engine = L2BookEngine()
+        self.record_path = record_path
+        self.tick_store_path = tick_store_path
+        self.recorder: Optional[MessageRecorder] = None
+        self.tick_store: Optional[TickStoreWriter] = None
+        self.shm_name = shm_name
+        self.ring: Optional[SharedRingWriter] = None
+        self.last_update: Optional[FeedUpdate] = None
+        self.last_message_time: Optional[float] = None
+        self.message_count = 0
+        self.queue_stats = QueueStats()
+        self.queue: Optional[asyncio.Queue] = None
+        if hasattr(source, "add_reconnect_listener"):
+            source.add_reconnect_listener(self.resync)
+
+    def resync(self):
+        """Drop the book after a reconnect; it is rebuilt from the next snapshot."""
+        self.book_engine.request_resync()
+        self.last_message_time = None
+
+    def request_snapshot(self):
+        """Ask the source to resubscribe after a sequence gap or checksum mismatch. Sources
+        that cannot, such as replays, leave the book waiting for their next snapshot."""
+        self.queue_stats.resyncs += 1
+        if hasattr(self.source, "request_resync"):
+            self.source.request_resync()
+
+    def open(self):
+        if self.record_path:
+            self.recorder = MessageRecorder(self.record_path)
+        if self.tick_store_path:
+            self.tick_store = TickStoreWriter(self.tick_store_path)
+        if self.shm_name:
+            self.ring = SharedRingWriter(self.shm_name)
+
+    def close(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+        if self.tick_store is not None:
+            self.tick_store.close()
+            self.tick_store = None
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    def process(self, message, recv_ns: int) -> Optional[FeedUpdate]:
+        """Receive and analyze one message in the calling thread."""
+        pending = self.receive(message, recv_ns)
+        if pending is None:
+            return None
+        update = self.compute(*pending)
+        self.persist(update)
+        return update
+
+    def receive(self, message, recv_ns: int) -> Optional[PendingBook]:
+        """Decode a message and apply it to the book. Every message must go through here in
+        order, so incremental updates are never lost even if the book is later dropped."""
+        self.message_count += 1
+        trace = TickTrace(recv_ns, time.time_ns())
+        recv_time = recv_ns / 1e9
+        if self.recorder is not None:
+            self.recorder.write(message, trace.recv_wall_ns)
+
+        if self.last_message_time is not None:
+            interarrival_ms = (recv_time - self.last_message_time) * 1000
+        else:
+            interarrival_ms = 0.0  # first message, nothing to compare
+        self.last_message_time = recv_time
+
+        update = self.decoder.decode_book(message)
+        trace.decoded = time.perf_counter_ns()
+        if update is None:
+            return None
+        trace.exchange_ms = update.timestamp
+
+        engine = self.book_engine
+        in_sync = not engine.needs_resync
+        order_book = engine.apply_update(update)
+        trace.book_built = time.perf_counter_ns()
+        if order_book is None:
+            if in_sync and engine.needs_resync:
+                self.request_snapshot()
+            return None
+
+        if order_book.is_empty():
+            return None
+        self.queue_stats.received += 1
+        return order_book, trace, interarrival_ms
+
+    def compute(self, order_book: OrderBook, trace: TickTrace, interarrival_ms: float) -> FeedUpdate:
+        """Run the cost model on a built book; safe to call from an executor thread."""
+        recv_time = trace.recv / 1e9
+        result = self.session.on_tick(order_book, recv_time)
+        trace.analyzed = time.perf_counter_ns()
+        return FeedUpdate(
+            self.key, order_book, result, recv_time, interarrival_ms,
+            trace.processing_ns / 1e6, trace, self.session.features
+        )
+
+    def persist(self, update: FeedUpdate):
+        self.last_update = update
+        if self.tick_store is not None:
+            self.tick_store.append(update.trace.recv_wall_ns, update.order_book, update.result)
+        if self.ring is not None:
+            self.ring.publish(update.trace.recv_wall_ns, update.order_book, update.result)
+
+
+class FeedManager:
+    """Runs many feed subscriptions on one asyncio loop and fans results out to subscribers.
+
+    Each feed has a receive task, which drains the socket, decodes and maintains the book,
+    and a compute task, which analyzes books from a bounded queue in an executor thread.
+    A slow analysis pass therefore delays results, not the socket, and the queue policy
+    decides whether backlog is worked through or skipped.
+
+    Subscribers are plain callables invoked on the event loop thread with a ``FeedUpdate``;
+    they can listen to every feed or to a single ``FeedKey``.
+    """
+
+    def __init__(self, decoder: str = "auto", calibrator: Optional[ModelCalibrator] = None,
+                 shm_prefix: Optional[str] = None, pipeline: Optional[PipelineConfig] = None,
+                 fees: Optional[FeeRegistry] = None):
+        self.decoder_name = decoder
+        self.pipeline = pipeline or PipelineConfig()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.calibrator = calibrator
+        self.fees = fees                # Fee schedules; the bundled config if None
+        self.shm_prefix = shm_prefix    # Publish each feed to a shared memory ring if set
+        self.latency = LatencyRecorder()
+        self._feeds: Dict[FeedKey, FeedState] = {}
+        self._subscribers: Dict[Optional[FeedKey], List[Subscriber]] = {}
+        self._tasks: Dict[FeedKey, asyncio.Task] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._running = False
+
+    @property
+    def feeds(self) -> List[FeedKey]:
+        return list(self._feeds)
+
+    def state(self, key: FeedKey) -> FeedState:
+        return self._feeds[key]
+
+    def connection_stats(self, key: FeedKey) -> Optional[ConnectionStats]:
+        return getattr(self._feeds[key].source, "stats", None)
+
+    def queue_stats(self, key: FeedKey) -> QueueStats:
+        return self._feeds[key].queue_stats
+
+    def add_feed(self, exchange: str, symbol: str, source=None, usd_amount: float = 100.0,
+                 fee_tier: FeeTier = FeeTier.TIER1, volatility: float = 0.6,
+                 record_path: Optional[str] = None, tick_store_path: Optional[str] = None) -> FeedKey:
+        key = FeedKey(exchange.upper(), symbol)
+        if key in self._feeds:
+            return key
+        session = AnalyzerSession(
+            exchange_name=key.exchange,
+            usd_amount=usd_amount,
+            fee_tier=fee_tier,
+            volatility=volatility,
+            calibrator=self.calibrator,
+            symbol=key.symbol,
+            fees=self.fees
+        )
+        state = FeedState(
+            key,
+            source if source is not None else WebSocketSource(gomarket_uri(exchange, symbol)),
+            session,
+            get_decoder(self.decoder_name),
+            record_path=record_path,
+            tick_store_path=tick_store_path,
+            shm_name=ring_name(self.shm_prefix, key.exchange, key.symbol) if self.shm_prefix else None,
+        )
+        self._feeds[key] = state
+        if self._running and self._loop is not None:
+            # Feeds added while running are started on the manager's loop
+            self._loop.call_soon_threadsafe(self._start_feed, state)
+        return key
+
+    def remove_feed(self, key: FeedKey):
+        state = self._feeds.pop(key, None)
+        if state is None:
+            return
+        state.source.stop()
+        task = self._tasks.pop(key, None)
+        if task is not None and self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(task.cancel)
+
+    def subscribe(self, callback: Subscriber, key: Optional[FeedKey] = None) -> Callable[[], None]:
+        self._subscribers.setdefault(key, []).append(callback)
+
+        def unsubscribe():
+            callbacks = self._subscribers.get(key, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+        return unsubscribe
+
+    async def stream(self, key: Optional[FeedKey] = None, maxsize: int = 0) -> AsyncIterator[FeedUpdate]:
+        """Async iterator over updates for one feed or all feeds.
+
+        If the manager is not already running it is started here, and the iterator ends
+        when every feed has finished. With ``maxsize`` set, the oldest queued update is
+        discarded when a slow consumer falls behind.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+        def put(update: FeedUpdate):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(update)
+
+        unsubscribe = self.subscribe(put, key)
+        runner = None
+        if not self._running:
+            runner = asyncio.get_running_loop().create_task(self.run())
+            # Wake the consumer once the feeds are done
+            runner.add_done_callback(lambda _: queue.put_nowait(None) if not queue.full() else None)
+        try:
+            while True:
+                if runner is not None and runner.done() and queue.empty():
+                    break
+                update = await queue.get()
+                if update is None:
+                    if runner is not None and runner.done() and queue.empty():
+                        break
+                    continue
+                yield update
+        finally:
+            unsubscribe()
+            if runner is not None and not runner.done():
+                self.stop()
+                runner.cancel()
+
+    def set_parameters(self, usd_amount=None, fee_tier=None, volatility=None, key: Optional[FeedKey] = None):
+        states = [self._feeds[key]] if key is not None else self._feeds.values()
+        for state in states:
+            state.session.set_parameters(usd_amount, fee_tier, volatility)
+
+    def _publish(self, update: FeedUpdate):
+        update.trace.emitted = time.perf_counter_ns()
+        self.latency.record_pipeline(update.trace)
+        for callback in self._subscribers.get(None, ()):
+            callback(update)
+        for callback in self._subscribers.get(update.key, ()):
+            callback(update)
+
+    def _enqueue(self, state: FeedState, pending: PendingBook) -> bool:
+        """Queue a book under a dropping policy; returns False if it was sampled out."""
+        queue = state.queue
+        stats = state.queue_stats
+        policy = self.pipeline.policy
+        if policy == QueuePolicy.SAMPLE and (stats.received - 1) % self.pipeline.sample_every:
+            stats.dropped += 1
+            return False
+        if policy == QueuePolicy.LATEST_ONLY:
+            while not queue.empty():
+                queue.get_nowait()
+                stats.dropped += 1
+        elif queue.full():
+            queue.get_nowait()
+            stats.dropped += 1
+        queue.put_nowait(pending)
+        return True
+
+    async def _receive(self, state: FeedState):
+        queue = state.queue
+        stats = state.queue_stats
+        async for message in state.source:
+            if not self._running:
+                break
+            pending = state.receive(message, time.perf_counter_ns())
+            if pending is None:
+                continue
+            if self.pipeline.policy == QueuePolicy.PROCESS_ALL:
+                await queue.put(pending)
+            elif not self._enqueue(state, pending):
+                continue
+            stats.enqueued += 1
+            stats.depth = queue.qsize()
+            stats.max_depth = max(stats.max_depth, stats.depth)
+        # Tell the compute task nothing more is coming once it has drained the queue
+        await queue.put(None)
+
+    async def _compute(self, state: FeedState):
+        loop = asyncio.get_running_loop()
+        queue = state.queue
+        stats = state.queue_stats
+        while True:
+            pending = await queue.get()
+            if pending is None:
+                return
+            order_book, trace, interarrival_ms = pending
+            trace.dequeued = time.perf_counter_ns()
+            stats.depth = queue.qsize()
+            stats.last_wait_ms = (trace.dequeued - trace.book_built) / 1e6
+            stats.max_wait_ms = max(stats.max_wait_ms, stats.last_wait_ms)
+            if self._executor is None:
+                update = state.compute(order_book, trace, interarrival_ms)
+            else:
+                update = await loop.run_in_executor(self._executor, state.compute, order_book, trace, interarrival_ms)
+            stats.processed += 1
+            state.persist(update)
+            self._publish(update)
+
+    async def _run_feed(self, state: FeedState):
+        try:
+            # A shared memory ring still owned by a live writer makes this fail
+            state.open()
+        except OSError as e:
+            print(f"[Feed] {state.key} error: {e}")
+            state.close()
+            return
+        state.queue = asyncio.Queue(self.pipeline.queue_size)
+        loop = asyncio.get_running_loop()
+        receive = loop.create_task(self._receive(state))
+        compute = loop.create_task(self._compute(state))
+        try:
+            # Stop early if either stage fails, otherwise let compute drain the queue
+            done, _ = await asyncio.wait({receive, compute}, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result()
+            await compute
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[Feed] {state.key} error: {e}")
+        finally:
+            for task in (receive, compute):
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(receive, compute, return_exceptions=True)
+            state.close()
+
+    def _start_feed(self, state: FeedState):
+        if state.key not in self._tasks:
+            self._tasks[state.key] = asyncio.get_running_loop().create_task(self._run_feed(state))
+
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self._running = True
+        if self.pipeline.compute_workers > 0 and self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.pipeline.compute_workers,
+                                                thread_name_prefix="feed-compute")
+        for state in list(self._feeds.values()):
+            self._start_feed(state)
+        try:
+            while self._tasks and self._running:
+                done, _ = await asyncio.wait(list(self._tasks.values()), return_when=asyncio.FIRST_COMPLETED)
+                for key in [k for k, t in self._tasks.items() if t in done]:
+                    del self._tasks[key]
+        finally:
+            self._running = False
+            for task in self._tasks.values():
+                task.cancel()
+            self._tasks.clear()
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def stop(self):
+        self._running = False
+        for state in self._feeds.values():
+            state.source.stop()
+        if self._loop is not None and not self._loop.is_closed():
+            for task in list(self._tasks.values()):
+                self._loop.call_soon_threadsafe(task.cancel)
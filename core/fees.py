@@ -0,0 +1,97 @@
+import json
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_FEE_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fee_schedules.json")
+CONFIG_VERSION = 1
+MIN_TIERS = 3   # Levels of ``FeeTier``; shorter schedules repeat their top tier
+
+
+@dataclass(frozen=True)
+class FeeSchedule:
+    """Maker and taker rates of one venue or instrument, indexed by tier (0 is tier 1).
+
+    Rates are fractions of notional. ``rates`` holds the same values as plain floats so
+    a per-tick lookup is one tuple index.
+    """
+    venue: str
+    instrument: Optional[str]
+    min_volume_usd: np.ndarray      # 30-day volume needed for each tier, ascending
+    maker: np.ndarray
+    taker: np.ndarray
+    rates: Tuple[Tuple[float, float], ...]
+
+    def tier_for_volume(self, volume_usd: float) -> int:
+        """Index of the highest tier whose volume threshold ``volume_usd`` reaches."""
+        return max(0, int(self.min_volume_usd.searchsorted(volume_usd, side="right")) - 1)
+
+    def blended_rate(self, tier: int, maker_prob: float, taker_prob: float) -> float:
+        maker, taker = self.rates[tier]
+        return maker_prob * maker + taker_prob * taker
+
+
+def _compile(venue: str, instrument: Optional[str], tiers: List[dict]) -> FeeSchedule:
+    if not tiers:
+        raise ValueError(f"{venue} {instrument or ''}: no fee tiers")
+    table = np.array([[t["min_volume_usd"], t["maker"], t["taker"]] for t in tiers], dtype=np.float64)
+    if np.any(np.diff(table[:, 0]) <= 0):
+        raise ValueError(f"{venue} {instrument or ''}: tier volumes must be strictly ascending")
+    if np.any(table[:, 2] < 0):
+        raise ValueError(f"{venue} {instrument or ''}: taker rates cannot be negative")
+    if table.shape[0] < MIN_TIERS:
+        # Padded tiers are unreachable by volume but keep every FeeTier a valid index
+        pad = np.repeat(table[-1:], MIN_TIERS - table.shape[0], axis=0)
+        pad[:, 0] = np.inf
+        table = np.vstack([table, pad])
+    volumes, maker, taker = (np.ascontiguousarray(column) for column in table.T)
+    for array in (volumes, maker, taker):
+        array.flags.writeable = False
+    rates = tuple(zip(maker.tolist(), taker.tolist()))
+    return FeeSchedule(venue, instrument, volumes, maker, taker, rates)
+
+
+class FeeRegistry:
+    """Fee schedules of every configured venue, compiled once from a JSON config.
+
+    Each venue has volume tiers of maker/taker rates and may override them for
+    individual instruments. ``schedule`` resolves a venue and instrument to its
+    compiled table when a session is set up, so per-tick fees are an index into
+    precomputed rates. Unknown venues fall back to the config's ``default`` venue.
+    """
+
+    def __init__(self, config: dict):
+        if config.get("version") != CONFIG_VERSION:
+            raise ValueError(f"not a version {CONFIG_VERSION} fee config")
+        self._schedules: Dict[Tuple[str, Optional[str]], FeeSchedule] = {}
+        for venue, spec in config["venues"].items():
+            venue = venue.upper()
+            self._schedules[(venue, None)] = _compile(venue, None, spec["tiers"])
+            for instrument, override in spec.get("instruments", {}).items():
+                self._schedules[(venue, instrument)] = _compile(venue, instrument, override["tiers"])
+        self.default_venue = config.get("default", next(iter(config["venues"]))).upper()
+        if (self.default_venue, None) not in self._schedules:
+            raise ValueError(f"default venue {self.default_venue} has no fee schedule")
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_FEE_CONFIG) -> "FeeRegistry":
+        with open(path) as f:
+            return cls(json.load(f))
+
+    @property
+    def venues(self) -> List[str]:
+        return sorted({venue for venue, _ in self._schedules})
+
+    def schedule(self, venue: str, instrument: Optional[str] = None) -> FeeSchedule:
+        venue = venue.upper()
+        schedule = self._schedules.get((venue, instrument)) or self._schedules.get((venue, None))
+        return schedule or self._schedules[(self.default_venue, None)]
+
+
+@lru_cache(maxsize=None)
+def fee_registry(path: str = DEFAULT_FEE_CONFIG) -> FeeRegistry:
+    """The registry for ``path``, read from disk on first use only."""
+    return FeeRegistry.load(path)
@@ -0,0 +1,110 @@
+from typing import Optional, Sequence
+
+import numpy as np
+
+from core.trade_analyzer import TradeCostResult
+
+COST_SERIES = ("slippage", "market_impact", "net_cost")
+
+
+class SeriesRing:
+    """Fixed-memory time series of per-tick values, one writer thread and any readers.
+
+    Samples go into preallocated arrays that wrap once ``capacity`` is reached, and
+    every ``block`` samples are also folded into a min/max summary. ``decimate`` reads
+    the summary when a pixel column spans many blocks, so a redraw costs about the
+    screen width however much history is in view. Readers never lock; a sample being
+    overwritten while a reader looks at the oldest edge can show up once as a glitch.
+    """
+
+    def __init__(self, columns: Sequence[str] = COST_SERIES, capacity: int = 1 << 19, block: int = 64):
+        self.columns = tuple(columns)
+        self.block = block
+        self.capacity = -(-capacity // block) * block
+        blocks = self.capacity // block
+        self._t = np.zeros(self.capacity)
+        self._values = np.zeros((self.capacity, len(self.columns)))
+        self._block_t = np.zeros(blocks)
+        self._block_min = np.zeros((blocks, len(self.columns)))
+        self._block_max = np.zeros((blocks, len(self.columns)))
+        self.count = 0
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def append(self, t: float, values: Sequence[float]):
+        count = self.count
+        index = count % self.capacity
+        self._t[index] = t
+        row = self._values[index]
+        row[:] = values
+        b = index // self.block
+        if index % self.block == 0:
+            self._block_t[b] = t
+            self._block_min[b] = row
+            self._block_max[b] = row
+        else:
+            np.minimum(self._block_min[b], row, out=self._block_min[b])
+            np.maximum(self._block_max[b], row, out=self._block_max[b])
+        # Published last, so readers only see complete samples
+        self.count = count + 1
+
+    def append_result(self, t: float, result: TradeCostResult):
+        self.append(t, [getattr(result, name) for name in self.columns])
+
+    def last(self) -> "tuple[Optional[float], Optional[np.ndarray]]":
+        count = self.count
+        if count == 0:
+            return None, None
+        index = (count - 1) % self.capacity
+        return float(self._t[index]), self._values[index].copy()
+
+    @staticmethod
+    def _segments(first: int, count: int, size: int) -> "list[slice]":
+        """Chronological slices holding writes ``first .. count - 1`` of a ring of ``size`` slots."""
+        if first >= count:
+            return []
+        head, tail = first % size, (count - 1) % size + 1
+        return [slice(head, tail)] if head < tail else [slice(head, size), slice(0, tail)]
+
+    def decimate(self, start: float, end: float, width: int) -> "tuple[np.ndarray, np.ndarray]":
+        """Min and max of each column over ``width`` equal time buckets of ``[start, end)``.
+
+        Returns two ``(width, len(columns))`` arrays; buckets without samples are NaN.
+        """
+        count = self.count
+        lo = np.full((width, len(self.columns)), np.nan)
+        hi = np.full((width, len(self.columns)), np.nan)
+        if count == 0 or width <= 0 or end <= start:
+            return lo, hi
+        edges = np.linspace(start, end, width + 1)
+
+        # Summary blocks only blur bucket edges when each bucket holds many of them
+        span = self._t[(count - 1) % self.capacity] - self._t[(count - len(self)) % self.capacity]
+        samples_per_bucket = len(self) * (end - start) / (width * span) if span > 0 else 0.0
+        raw = (self._t, self._values, self._values)
+        if samples_per_bucket >= 4 * self.block:
+            full = count // self.block
+            blocks = self.capacity // self.block
+            summary = (self._block_t, self._block_min, self._block_max)
+            # The block being written is read raw until it completes; once wrapped its slot
+            # also held the oldest block, so that one is dropped
+            parts = [(summary, segment) for segment in self._segments(max(0, full - blocks + 1), full, blocks)]
+            parts += [(raw, segment) for segment in self._segments(full * self.block, count, self.capacity)]
+        else:
+            parts = [(raw, segment) for segment in self._segments(count - len(self), count, self.capacity)]
+
+        for (t, mins, maxs), segment in parts:
+            bounds = t[segment].searchsorted(edges, side="left")
+            first, last = bounds[0], bounds[-1]
+            if first == last:
+                continue
+            # reduceat needs non-empty runs, so reduce at the occupied bucket starts only
+            starts = bounds[:-1]
+            occupied = np.flatnonzero(bounds[1:] > starts)
+            offsets = starts[occupied] - first
+            seg_min = np.minimum.reduceat(mins[segment][first:last], offsets)
+            seg_max = np.maximum.reduceat(maxs[segment][first:last], offsets)
+            lo[occupied] = np.fmin(lo[occupied], seg_min)
+            hi[occupied] = np.fmax(hi[occupied], seg_max)
+        return lo, hi
@@ -0,0 +1,173 @@
+import csv
+import json
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Pipeline stages, in order. Each is the time from the previous stamp to this one,
+# except "feed" (exchange timestamp to receive, wall clock) and "end_to_end".
+STAGES = ("feed", "decode", "book", "queue", "analyze", "emit", "render", "end_to_end")
+PERCENTILES = (50.0, 99.0, 99.9)
+
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram of nanosecond latencies.
+
+    Values below ``2 ** sub_bucket_bits`` ns are counted exactly; above that each power
+    of two is split into ``2 ** (sub_bucket_bits - 1)`` linear buckets, so the relative
+    error stays under ``2 ** -(sub_bucket_bits - 1)`` at any magnitude.
+    """
+
+    def __init__(self, sub_bucket_bits: int = 8, max_value_ns: int = 100 * 10 ** 9):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.sub_bucket_count = 1 << sub_bucket_bits
+        self.sub_bucket_half = self.sub_bucket_count >> 1
+        self.max_value_ns = max_value_ns
+        self.counts: List[int] = [0] * (self._index(max_value_ns) + 1)
+        self.total = 0
+        self.sum_ns = 0
+        self.min_ns: Optional[int] = None
+        self.max_ns = 0
+
+    def _index(self, value: int) -> int:
+        shift = value.bit_length() - self.sub_bucket_bits
+        if shift <= 0:
+            return value
+        return (shift + 1) * self.sub_bucket_half + (value >> shift) - self.sub_bucket_half
+
+    def _highest_equivalent(self, index: int) -> int:
+        if index < self.sub_bucket_count:
+            return index
+        offset = index - self.sub_bucket_count
+        shift = offset // self.sub_bucket_half + 1
+        sub = offset % self.sub_bucket_half + self.sub_bucket_half
+        return ((sub + 1) << shift) - 1
+
+    def record(self, value_ns: int):
+        value_ns = min(max(int(value_ns), 0), self.max_value_ns)
+        self.counts[self._index(value_ns)] += 1
+        self.total += 1
+        self.sum_ns += value_ns
+        if self.min_ns is None or value_ns < self.min_ns:
+            self.min_ns = value_ns
+        if value_ns > self.max_ns:
+            self.max_ns = value_ns
+
+    def percentiles(self, percentiles=PERCENTILES) -> List[int]:
+        if self.total == 0:
+            return [0 for _ in percentiles]
+        cumulative = np.cumsum(self.counts)
+        results = []
+        for p in percentiles:
+            rank = max(1, int(np.ceil(p / 100.0 * self.total)))
+            index = int(np.searchsorted(cumulative, rank, side="left"))
+            results.append(min(self._highest_equivalent(index), self.max_ns))
+        return results
+
+    @property
+    def mean_ns(self) -> float:
+        return self.sum_ns / self.total if self.total else 0.0
+
+    def merge(self, other: "LatencyHistogram"):
+        if other.sub_bucket_bits != self.sub_bucket_bits or len(other.counts) != len(self.counts):
+            raise ValueError("Histograms must share the same bucket layout to merge")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+        self.sum_ns += other.sum_ns
+        if other.min_ns is not None:
+            self.min_ns = other.min_ns if self.min_ns is None else min(self.min_ns, other.min_ns)
+        self.max_ns = max(self.max_ns, other.max_ns)
+
+    def reset(self):
+        self.counts = [0] * len(self.counts)
+        self.total = 0
+        self.sum_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+
+
+class TickTrace:
+    """Timestamps for one message as it moves through the pipeline (perf_counter_ns)."""
+
+    __slots__ = ("exchange_ms", "recv_wall_ns", "recv", "decoded", "book_built", "dequeued", "analyzed",
+                 "emitted", "rendered")
+
+    def __init__(self, recv: int, recv_wall_ns: int):
+        self.recv = recv
+        self.recv_wall_ns = recv_wall_ns
+        self.exchange_ms: Optional[float] = None
+        self.decoded = 0
+        self.book_built = 0
+        self.dequeued = 0
+        self.analyzed = 0
+        self.emitted = 0
+        self.rendered = 0
+
+    @property
+    def processing_ns(self) -> int:
+        return self.analyzed - self.recv
+
+
+class LatencyRecorder:
+    """One histogram per pipeline stage.
+
+    Each stage is recorded from a single thread (the feed loop or the GUI thread),
+    so histograms need no locking; readers just see a slightly stale snapshot.
+    """
+
+    def __init__(self, stages=STAGES):
+        self.histograms: Dict[str, LatencyHistogram] = {stage: LatencyHistogram() for stage in stages}
+        self.started = time.time()
+
+    def record(self, stage: str, value_ns: int):
+        self.histograms[stage].record(value_ns)
+
+    def record_pipeline(self, trace: TickTrace):
+        """Record the stages stamped on the feed loop thread, up to and including emit."""
+        if trace.exchange_ms is not None:
+            self.record("feed", trace.recv_wall_ns - int(trace.exchange_ms * 1_000_000))
+        self.record("decode", trace.decoded - trace.recv)
+        self.record("book", trace.book_built - trace.decoded)
+        if trace.dequeued:
+            self.record("queue", trace.dequeued - trace.book_built)
+        self.record("analyze", trace.analyzed - (trace.dequeued or trace.book_built))
+        if trace.emitted:
+            self.record("emit", trace.emitted - trace.analyzed)
+
+    def record_render(self, trace: TickTrace):
+        self.record("render", trace.rendered - (trace.emitted or trace.analyzed))
+        self.record("end_to_end", trace.rendered - trace.recv)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage count, mean, p50, p99, p99.9 and max in milliseconds."""
+        summary = {}
+        for stage, histogram in self.histograms.items():
+            p50, p99, p999 = histogram.percentiles(PERCENTILES)
+            summary[stage] = {
+                "count": histogram.total,
+                "mean_ms": histogram.mean_ns / 1e6,
+                "p50_ms": p50 / 1e6,
+                "p99_ms": p99 / 1e6,
+                "p99.9_ms": p999 / 1e6,
+                "max_ms": histogram.max_ns / 1e6,
+            }
+        return summary
+
+    def export(self, path: str):
+        """Write the summary as CSV (``.csv``) or JSON (anything else)."""
+        summary = self.summary()
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                columns = ["count", "mean_ms", "p50_ms", "p99_ms", "p99.9_ms", "max_ms"]
+                writer.writerow(["stage"] + columns)
+                for stage, row in summary.items():
+                    writer.writerow([stage] + [row[c] for c in columns])
+        else:
+            with open(path, "w") as f:
+                json.dump({"started": self.started, "exported": time.time(), "stages": summary}, f, indent=2)
+
+    def reset(self):
+        for histogram in self.histograms.values():
+            histogram.reset()
@@ -0,0 +1,279 @@
+import argparse
+import asyncio
+import random
+import ssl
+import struct
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Iterator, List, Optional, Tuple, Union
+
+RECORD_MAGIC = b"TSREC01\n"
+_RECORD_HEADER = struct.Struct("<qI")  # receive time (ns since epoch), payload length
+
+Message = Union[str, bytes]
+
+
+class MessageRecorder:
+    """Appends raw feed messages with their receive timestamp to a compact binary file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(RECORD_MAGIC)
+        self.count = 0
+
+    def write(self, message: Message, recv_time_ns: Optional[int] = None):
+        payload = message.encode() if isinstance(message, str) else message
+        if recv_time_ns is None:
+            recv_time_ns = time.time_ns()
+        self._file.write(_RECORD_HEADER.pack(recv_time_ns, len(payload)))
+        self._file.write(payload)
+        self.count += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_records(path: str) -> Iterator[Tuple[int, bytes]]:
+    """Yields ``(recv_time_ns, payload)`` pairs; a truncated trailing record is ignored."""
+    with open(path, "rb") as f:
+        if f.read(len(RECORD_MAGIC)) != RECORD_MAGIC:
+            raise ValueError(f"{path} is not a recorded market data file")
+        header_size = _RECORD_HEADER.size
+        while True:
+            header = f.read(header_size)
+            if len(header) < header_size:
+                return
+            recv_time_ns, length = _RECORD_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                return
+            yield recv_time_ns, payload
+
+
+@dataclass
+class ReconnectPolicy:
+    initial_delay: float = 0.5      # Seconds before the first reconnect attempt
+    max_delay: float = 30.0
+    multiplier: float = 2.0
+    jitter: float = 0.5             # Fraction of each delay that is randomized
+    ping_interval: float = 10.0
+    ping_timeout: float = 10.0
+    stale_timeout: float = 15.0     # Reconnect if no message arrives for this long
+    healthy_after: float = 5.0      # Backoff resets once a connection has delivered messages this long
+    max_attempts: Optional[int] = None
+
+    def delay(self, attempt: int) -> float:
+        base = min(self.max_delay, self.initial_delay * self.multiplier ** attempt)
+        return base * (1.0 - self.jitter * random.random())
+
+
+@dataclass
+class ConnectionStats:
+    connects: int = 0
+    disconnects: int = 0
+    stale_disconnects: int = 0
+    last_error: str = ""
+    last_disconnect_time: Optional[float] = None
+    last_recovery_s: float = 0.0
+    max_recovery_s: float = 0.0
+    total_downtime_s: float = 0.0
+    resyncs: int = 0                # Reconnects requested by the consumer to get a fresh snapshot
+
+
+class WebSocketSource:
+    """Live messages from a WebSocket endpoint, reconnecting with jittered exponential
+    backoff on errors, ping timeouts or a stale feed.
+
+    Listeners registered with ``add_reconnect_listener`` are called after every reconnect
+    so consumers can resync their book state. A consumer whose book has gone out of sync
+    calls ``request_resync`` to reconnect at once, since the feed sends a fresh snapshot
+    to every new subscription.
+    """
+
+    def __init__(self, uri: str, policy: Optional[ReconnectPolicy] = None):
+        self.uri = uri
+        self.policy = policy or ReconnectPolicy()
+        self.stats = ConnectionStats()
+        self._reconnect_listeners: List[Callable[[], None]] = []
+        self._running = True
+        self._resync_requested = False
+
+    def add_reconnect_listener(self, callback: Callable[[], None]):
+        self._reconnect_listeners.append(callback)
+
+    def _on_connected(self):
+        # A fresh subscription starts with a snapshot, which answers any pending request
+        self._resync_requested = False
+        stats = self.stats
+        stats.connects += 1
+        if stats.last_disconnect_time is None:
+            return
+        recovery = time.monotonic() - stats.last_disconnect_time
+        stats.last_recovery_s = recovery
+        stats.max_recovery_s = max(stats.max_recovery_s, recovery)
+        stats.total_downtime_s += recovery
+        stats.last_disconnect_time = None
+        print(f"[Connection] {self.uri} recovered after {recovery * 1000:.0f} ms")
+        for callback in self._reconnect_listeners:
+            callback()
+
+    def _on_disconnected(self, error: str, stale: bool = False):
+        stats = self.stats
+        stats.disconnects += 1
+        stats.stale_disconnects += int(stale)
+        stats.last_error = error
+        if stats.last_disconnect_time is None:
+            stats.last_disconnect_time = time.monotonic()
+        print(f"[Connection] {self.uri} disconnected: {error}")
+
+    async def __aiter__(self) -> AsyncIterator[Message]:
+        import websockets
+        ssl_context = ssl.create_default_context() if self.uri.startswith("wss://") else None
+        policy = self.policy
+        attempt = 0
+
+        while self._running:
+            try:
+                async with websockets.connect(
+                    self.uri,
+                    ssl=ssl_context,
+                    ping_interval=policy.ping_interval,
+                    ping_timeout=policy.ping_timeout
+                ) as websocket:
+                    self._on_connected()
+                    connected_at = time.monotonic()
+                    while self._running and not self._resync_requested:
+                        message = await asyncio.wait_for(websocket.recv(), timeout=policy.stale_timeout)
+                        # A server that accepts and then drops or stalls us must not reset the backoff
+                        if attempt and time.monotonic() - connected_at >= policy.healthy_after:
+                            attempt = 0
+                        yield message
+                if not self._resync_requested:
+                    return
+                self._resync_requested = False
+                self.stats.resyncs += 1
+                if attempt == 0:
+                    # A first resync is not a failure, so resubscribe straight away
+                    attempt = 1
+                    continue
+            except asyncio.TimeoutError:
+                self._on_disconnected(f"no message for {policy.stale_timeout:.1f} s", stale=True)
+            except Exception as e:
+                self._on_disconnected(str(e) or type(e).__name__)
+
+            if policy.max_attempts is not None and attempt >= policy.max_attempts:
+                raise ConnectionError(f"Giving up on {self.uri} after {attempt} reconnect attempts")
+            await asyncio.sleep(policy.delay(attempt))
+            attempt += 1
+
+    def request_resync(self):
+        """Drop the connection after the current message and resubscribe."""
+        self._resync_requested = True
+
+    def stop(self):
+        self._running = False
+
+
+class ReplaySource:
+    """Messages from a recording, at ``speed`` times the recorded pace or, if ``speed`` is
+    None, as fast as the consumer takes them."""
+
+    def __init__(self, path: str, speed: Optional[float] = 1.0, loop: bool = False):
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self._running = True
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        while self._running:
+            first_recorded = None
+            start = time.perf_counter()
+            for recv_time_ns, payload in read_records(self.path):
+                if not self._running:
+                    return
+                if self.speed:
+                    if first_recorded is None:
+                        first_recorded = recv_time_ns
+                    due = (recv_time_ns - first_recorded) / 1e9 / self.speed
+                    delay = due - (time.perf_counter() - start)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                else:
+                    # Still yield to the loop so other tasks are not starved
+                    await asyncio.sleep(0)
+                yield payload
+            if not self.loop:
+                return
+
+    def stop(self):
+        self._running = False
+
+
+async def record(uri: str, path: str, duration: Optional[float] = None):
+    source = WebSocketSource(uri)
+    deadline = None if duration is None else time.monotonic() + duration
+    with MessageRecorder(path) as recorder:
+        async for message in source:
+            recorder.write(message)
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+    print(f"Recorded {recorder.count} messages to {path}")
+
+
+async def serve_replay(path: str, host: str = "localhost", port: int = 8765,
+                       speed: Optional[float] = 1.0, loop: bool = False):
+    """Local WebSocket stand-in that replays a recording to every client that connects."""
+    import websockets
+
+    async def handler(websocket, *_):
+        try:
+            async for payload in ReplaySource(path, speed=speed, loop=loop):
+                await websocket.send(payload.decode())
+        except websockets.ConnectionClosed:
+            pass
+
+    async with websockets.serve(handler, host, port):
+        print(f"Replaying {path} on ws://{host}:{port}")
+        await asyncio.Future()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record or replay L2 market data")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_cmd = commands.add_parser("record", help="record a live feed to a file")
+    record_cmd.add_argument("uri")
+    record_cmd.add_argument("path")
+    record_cmd.add_argument("--duration", type=float, help="seconds to record (default: until interrupted)")
+
+    serve_cmd = commands.add_parser("serve", help="replay a recording as a local WebSocket server")
+    serve_cmd.add_argument("path")
+    serve_cmd.add_argument("--host", default="localhost")
+    serve_cmd.add_argument("--port", type=int, default=8765)
+    serve_cmd.add_argument("--speed", type=float, default=1.0, help="pace multiplier, 0 for as fast as possible")
+    serve_cmd.add_argument("--loop", action="store_true")
+
+    args = parser.parse_args()
+    try:
+        if args.command == "record":
+            asyncio.run(record(args.uri, args.path, args.duration))
+        else:
+            asyncio.run(serve_replay(args.path, args.host, args.port, args.speed or None, args.loop))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
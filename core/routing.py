@@ -0,0 +1,319 @@
+import argparse
+import asyncio
+import heapq
+import sys
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from core.cli import positive_int
+from core.feed_manager import FeedKey, FeedManager, FeedUpdate
+from core.fees import FeeRegistry, fee_registry
+from core.market_data import ReplaySource
+from core.trade_analyzer import FeeTier, OrderBook, OrderSide
+
+
+class VenueCurve:
+    """One venue's side of the book in fee-inclusive terms.
+
+    A buy pays ``price * (1 + taker)`` per unit and a sell receives ``price * (1 - taker)``,
+    so levels from different venues compare directly. ``keys`` orders levels best first
+    for a min-heap; ``usd`` is what each whole level costs (or yields) including fees.
+    The per-level lists are only built when a walk needs them.
+    """
+
+    def __init__(self, key: FeedKey, order_book: OrderBook, side: OrderSide, fee_rate: float):
+        self.key = key
+        self.fee_rate = fee_rate
+        self.sign = 1.0 if side == OrderSide.BUY else -1.0
+        self.factor = 1.0 + self.sign * fee_rate
+        self.book_prices, self.sizes, self.cum_qty, self.cum_notional = order_book.side_arrays(side)
+
+    def __len__(self) -> int:
+        return self.book_prices.size
+
+    @cached_property
+    def prices(self) -> List[float]:
+        return (self.book_prices * self.factor).tolist()
+
+    @cached_property
+    def keys(self) -> List[float]:
+        return (self.book_prices * (self.factor * self.sign)).tolist()
+
+    @cached_property
+    def usd(self) -> List[float]:
+        return (self.book_prices * self.sizes * self.factor).tolist()
+
+    def key_at(self, level: int) -> float:
+        return float(self.book_prices[level]) * self.factor * self.sign
+
+    def same_levels(self, other: "VenueCurve", levels: int) -> bool:
+        if self.book_prices is other.book_prices and self.sizes is other.sizes:
+            return True
+        return (np.array_equal(self.book_prices[:levels], other.book_prices[:levels])
+                and np.array_equal(self.sizes[:levels], other.sizes[:levels]))
+
+    def quantity_for(self, usd_amount: float) -> Optional[float]:
+        """Quantity to fill ``usd_amount``, fees included, on this venue alone; None if it is too thin."""
+        notional = usd_amount / self.factor
+        i = int(self.cum_notional.searchsorted(notional, side="left"))
+        if i >= self.book_prices.size:
+            return None
+        before_notional = float(self.cum_notional[i - 1]) if i else 0.0
+        before_qty = float(self.cum_qty[i - 1]) if i else 0.0
+        return before_qty + (notional - before_notional) / float(self.book_prices[i])
+
+
+@dataclass
+class VenueAllocation:
+    key: FeedKey
+    usd_amount: float       # Spent (buy) or received (sell), including fees
+    quantity: float
+    fee: float
+    levels: int             # Levels touched, the last possibly in part
+
+    @property
+    def avg_price(self) -> float:
+        """Fee-inclusive average price."""
+        return self.usd_amount / self.quantity if self.quantity > 0 else 0.0
+
+
+@dataclass
+class RoutingPlan:
+    usd_amount: float
+    side: OrderSide
+    allocations: Dict[FeedKey, VenueAllocation] = field(default_factory=dict)
+    quantity: float = 0.0
+    filled_usd: float = 0.0
+    fee: float = 0.0
+    reference_price: float = 0.0    # Consolidated mid: best bid and best ask over all venues
+    marginal_key: float = 0.0       # Heap key of the last level filled
+    single_venue_quantity: Dict[FeedKey, float] = field(default_factory=dict)   # Venues that can fill alone
+
+    @property
+    def fully_filled(self) -> bool:
+        return self.filled_usd >= self.usd_amount * (1.0 - 1e-12)
+
+    @property
+    def avg_price(self) -> float:
+        return self.filled_usd / self.quantity if self.quantity > 0 else 0.0
+
+    @property
+    def cost(self) -> float:
+        """USD lost to spread, depth and fees against the consolidated mid."""
+        if self.side == OrderSide.BUY:
+            return self.filled_usd - self.quantity * self.reference_price
+        return self.quantity * self.reference_price - self.filled_usd
+
+    def improvement_bps(self) -> float:
+        """Quantity bought (or saved on a sell) over the best single venue, in bps of its fill."""
+        quantities = self.single_venue_quantity.values()
+        if not quantities:
+            return 0.0
+        if self.side == OrderSide.BUY:
+            best = max(quantities)
+            return (self.quantity - best) / best * 10_000.0 if best > 0 else 0.0
+        best = min(quantities)
+        return (best - self.quantity) / best * 10_000.0 if best > 0 else 0.0
+
+
+class SmartOrderRouter:
+    """Splits a parent market order across venues to minimize its fee-inclusive cost.
+
+    The order is ``usd_amount`` to spend on a buy or to raise on a sell, fees included.
+    Filling the best fee-inclusive level available anywhere until the amount is reached
+    is optimal, so the depth curves of all venues are merged with a heap-based k-way
+    walk that stops as soon as the order is filled: O(m log k) for m levels consumed
+    on k venues.
+
+    ``update_book`` rebuilds only the changed venue's curve and keeps the current plan
+    when the levels it used are unchanged and its next level is no better than the
+    marginal level; otherwise the walk is rerun.
+    """
+
+    def __init__(self, usd_amount: float, side: OrderSide = OrderSide.BUY, fee_tier: FeeTier = FeeTier.TIER1,
+                 fees: Optional[FeeRegistry] = None):
+        self.usd_amount = usd_amount
+        self.side = side
+        self.fee_tier = fee_tier
+        self.fees = fees or fee_registry()
+        self._books: Dict[FeedKey, OrderBook] = {}
+        self._curves: Dict[FeedKey, VenueCurve] = {}
+        self._plan: Optional[RoutingPlan] = None
+        self.recomputed = 0     # Plans produced by a full walk
+        self.reused = 0         # Book updates that left the plan unchanged
+
+    @property
+    def venues(self) -> List[FeedKey]:
+        return list(self._curves)
+
+    def fee_rate(self, key: FeedKey) -> float:
+        return self.fees.schedule(key.exchange, key.symbol).rates[self.fee_tier.value - 1][1]
+
+    def set_order(self, usd_amount: Optional[float] = None, side: Optional[OrderSide] = None,
+                  fee_tier: Optional[FeeTier] = None):
+        if usd_amount is not None:
+            self.usd_amount = usd_amount
+        if (side is not None and side != self.side) or (fee_tier is not None and fee_tier != self.fee_tier):
+            self.side = side or self.side
+            self.fee_tier = fee_tier or self.fee_tier
+            # Curves depend on the side of the book and the fee rate
+            self._curves = {key: VenueCurve(key, book, self.side, self.fee_rate(key))
+                            for key, book in self._books.items()}
+        self._plan = None
+
+    def remove_venue(self, key: FeedKey):
+        self._books.pop(key, None)
+        if self._curves.pop(key, None) is not None:
+            self._plan = None
+
+    def update_book(self, key: FeedKey, order_book: OrderBook) -> RoutingPlan:
+        self._books[key] = order_book
+        old = self._curves.get(key)
+        curve = VenueCurve(key, order_book, self.side, self.fee_rate(key) if old is None else old.fee_rate)
+        self._curves[key] = curve
+        plan = self._plan
+        if plan is not None and old is not None and self._unchanged(plan, old, curve):
+            self.reused += 1
+            # Fills are unchanged, but the reference mid and single-venue comparison move with the book
+            plan.reference_price = self._reference_price()
+            self._set_single_venue(plan, curve)
+            return plan
+        self._plan = None
+        return self.plan()
+
+    def _unchanged(self, plan: RoutingPlan, old: VenueCurve, new: VenueCurve) -> bool:
+        if not plan.fully_filled:
+            return False    # Any new liquidity changes an unfilled plan
+        allocation = plan.allocations.get(new.key)
+        used = allocation.levels if allocation is not None else 0
+        if not new.same_levels(old, used):
+            return False
+        # The next level must not undercut the marginal one, or it would have been filled first
+        return len(new) <= used or new.key_at(used) >= plan.marginal_key
+
+    def _set_single_venue(self, plan: RoutingPlan, curve: VenueCurve):
+        quantity = curve.quantity_for(self.usd_amount)
+        if quantity is None:
+            plan.single_venue_quantity.pop(curve.key, None)
+        else:
+            plan.single_venue_quantity[curve.key] = quantity
+
+    def _reference_price(self) -> float:
+        books = self._books.values()
+        asks = [float(b.ask_prices[0]) for b in books if b.ask_prices.size]
+        bids = [float(b.bid_prices[0]) for b in books if b.bid_prices.size]
+        if not asks or not bids:
+            return 0.0
+        return (min(asks) + max(bids)) / 2.0
+
+    def plan(self) -> RoutingPlan:
+        if self._plan is None:
+            self._plan = self._walk()
+            self.recomputed += 1
+        return self._plan
+
+    def _walk(self) -> RoutingPlan:
+        curves = [c for c in self._curves.values() if len(c)]
+        plan = RoutingPlan(self.usd_amount, self.side, reference_price=self._reference_price())
+        positions = [0] * len(curves)
+        spent = [0.0] * len(curves)
+        quantity = [0.0] * len(curves)
+        heap = [(c.keys[0], v) for v, c in enumerate(curves)]
+        heapq.heapify(heap)
+        remaining = self.usd_amount
+        while remaining > 0 and heap:
+            key, v = heap[0]
+            curve = curves[v]
+            i = positions[v]
+            take = min(remaining, curve.usd[i])
+            spent[v] += take
+            quantity[v] += take / curve.prices[i]
+            remaining -= take
+            positions[v] = i + 1
+            plan.marginal_key = key
+            if take < curve.usd[i]:
+                break
+            if i + 1 < len(curve):
+                heapq.heapreplace(heap, (curve.keys[i + 1], v))
+            else:
+                heapq.heappop(heap)
+
+        sign = 1.0 if self.side == OrderSide.BUY else -1.0
+        for v, curve in enumerate(curves):
+            self._set_single_venue(plan, curve)
+            if positions[v] == 0:
+                continue
+            # Fees are charged on notional: spent = notional * (1 + fee) on a buy, (1 - fee) on a sell
+            notional = spent[v] / (1.0 + sign * curve.fee_rate)
+            fee = notional * curve.fee_rate
+            plan.allocations[curve.key] = VenueAllocation(curve.key, spent[v], quantity[v], fee, positions[v])
+            plan.quantity += quantity[v]
+            plan.filled_usd += spent[v]
+            plan.fee += fee
+        return plan
+
+    def attach(self, manager: FeedManager) -> Callable[[], None]:
+        """Follow every feed of ``manager``; returns the unsubscribe function."""
+        def on_update(update: FeedUpdate):
+            self.update_book(update.key, update.order_book)
+        return manager.subscribe(on_update)
+
+
+def format_plan(plan: RoutingPlan) -> str:
+    lines = [f"{plan.side.value} ${plan.usd_amount:,.2f}: {plan.quantity:.6f} @ {plan.avg_price:.2f} "
+             f"(fees ${plan.fee:.2f}, cost ${plan.cost:.2f}, {plan.improvement_bps():+.2f} bps vs best venue)"]
+    for key, allocation in plan.allocations.items():
+        share = allocation.usd_amount / plan.filled_usd * 100.0 if plan.filled_usd else 0.0
+        lines.append(f"  {str(key):<28} {share:6.2f}%  {allocation.quantity:.6f} @ {allocation.avg_price:.2f} "
+                     f"over {allocation.levels} levels")
+    return "\n".join(lines)
+
+
+async def run(args) -> int:
+    fees = fee_registry(args.fees) if args.fees else None
+    manager = FeedManager(fees=fees)
+    feeds = [FeedKey.parse(feed) for feed in args.feed]
+    for i, key in enumerate(feeds):
+        source = ReplaySource(args.replay[i], speed=args.speed or None) if args.replay else None
+        manager.add_feed(key.exchange, key.symbol, source=source)
+    router = SmartOrderRouter(args.usd, OrderSide.BUY if args.side == "buy" else OrderSide.SELL,
+                              FeeTier(args.fee_tier), fees=manager.fees)
+    router.attach(manager)
+
+    count = 0
+    async for update in manager.stream():
+        count += 1
+        if len(router.venues) == len(feeds) and count % args.every == 0:
+            print(format_plan(router.plan()))
+            if args.limit and count >= args.limit:
+                break
+    print(f"{count} updates, {router.recomputed} plans walked, {router.reused} reused", file=sys.stderr)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Route a parent market order across venues at least cost")
+    parser.add_argument("--feed", action="append", required=True, metavar="EXCHANGE:SYMBOL",
+                        help="venue to route to (repeat for each)")
+    parser.add_argument("--replay", action="append", default=[], help="recording per --feed, in the same order")
+    parser.add_argument("--speed", type=float, default=0.0, help="replay pace multiplier, 0 for as fast as possible")
+    parser.add_argument("--usd", type=float, default=100_000.0, help="parent order size in USD, fees included")
+    parser.add_argument("--side", choices=["buy", "sell"], default="buy")
+    parser.add_argument("--fee-tier", type=int, choices=[1, 2, 3], default=1)
+    parser.add_argument("--fees", help="fee schedule config (JSON) instead of the bundled one")
+    parser.add_argument("--every", type=positive_int, default=100, help="print the plan every N book updates")
+    parser.add_argument("--limit", type=int, default=0, help="stop after this many updates")
+    args = parser.parse_args()
+    if args.replay and len(args.replay) != len(args.feed):
+        parser.error("give one --replay per --feed")
+    try:
+        sys.exit(asyncio.run(run(args)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import time
+from typing import Optional
+
+from core.calibration import ExecutionProbe, ModelCalibrator
+from core.features import BookFeatures, FeatureCache
+from core.fees import FeeRegistry
+from core.trade_analyzer import (
+    TradeAnalyzer, OrderBook, FeeTier, MarketImpactParams, MakerTakerInput,
+    MakerTakerResult, NetCostInput, TradeCostResult
+)
+from core.volatility import RollingVolatility, VolatilityEstimator
+
+
+class AnalyzerSession:
+    """Long-lived cost model state for one instrument.
+
+    Derived quantities are cached per book version and per parameter version, so a new
+    tick only recomputes what depends on the book (features, volatility, impact
+    coefficients, slippage and impact), while the maker/taker estimate and the fee
+    blended from it are only recomputed when their inputs change.
+    """
+
+    def __init__(self, exchange_name: str = "OKX", usd_amount: float = 100.0,
+                 fee_tier: FeeTier = FeeTier.TIER1, volatility: float = 0.6,
+                 volatility_estimator: Optional[VolatilityEstimator] = None,
+                 calibrator: Optional[ModelCalibrator] = None, symbol: Optional[str] = None,
+                 fees: Optional[FeeRegistry] = None):
+        self.exchange_name = exchange_name
+        self.usd_amount = usd_amount
+        self.fee_tier = fee_tier
+        self.analyzer = TradeAnalyzer(OrderBook(), exchange_name=exchange_name, fee_tier=fee_tier,
+                                      symbol=symbol, fees=fees)
+        self.volatility_estimator = volatility_estimator or RollingVolatility(window=50)
+        self.mk_input = MakerTakerInput(
+            is_market_order=True,
+            volatility=volatility,
+            order_book_depth=0.4,
+            time_since_last_trade=0.3
+        )
+        self.mi_params = MarketImpactParams(eta=0.0001, gamma=0.000025, lambda_=0.05, sigma=0.0)
+        self.feature_cache = FeatureCache()
+        self.features: Optional[BookFeatures] = None
+        self.calibrator = calibrator
+        self._maker_taker_updates = 0
+        self.execution_probe: Optional[ExecutionProbe] = None
+        if calibrator is not None:
+            calibrator.attach(self.analyzer, exchange_name)
+            self.execution_probe = ExecutionProbe()
+
+        self.book_version = 0
+        self.params_version = 0
+        self.spread = 0.0
+        self.mid_price = 0.0
+        self.sigma = 0.0
+
+        self._fee: Optional[float] = None
+        self._maker_taker: Optional[MakerTakerResult] = None
+        self._result: Optional[TradeCostResult] = None
+        self._result_key = (-1, -1)
+
+    @property
+    def order_book(self) -> OrderBook:
+        return self.analyzer.order_book
+
+    def set_parameters(self, usd_amount=None, fee_tier=None, volatility=None):
+        if usd_amount is not None and usd_amount != self.usd_amount:
+            self.usd_amount = usd_amount
+            self._fee = None
+        if fee_tier is not None and fee_tier != self.fee_tier:
+            self.fee_tier = fee_tier
+            self.analyzer.fee_tier = fee_tier
+            self._fee = None
+        if volatility is not None and volatility != self.mk_input.volatility:
+            self.mk_input.volatility = volatility
+            self._maker_taker = None
+        self.params_version += 1
+
+    def update_book(self, order_book: OrderBook, timestamp: Optional[float] = None):
+        self.analyzer.order_book = order_book
+        self.book_version += 1
+        if order_book.is_empty():
+            return
+        features = self.features = self.feature_cache.update(order_book, self.book_version, timestamp)
+        self.spread = features.spread
+        self.mid_price = features.mid_price
+        self.sigma = self.volatility_estimator.update(self.mid_price, timestamp)
+
+        # Estimate eta, gamma, lambda based on live data
+        params = self.mi_params
+        params.eta = 0.0001 + 0.05 * self.spread   # Temporary market impact scaling with spread
+        params.gamma = params.eta * 0.25           # Permanent market impact scaled from eta
+        params.lambda_ = 0.05 + 0.1 * self.sigma   # Risk aversion scaled from volatility
+        params.sigma = self.sigma
+
+        if self.calibrator is not None:
+            self.calibrator.observe_book(self.exchange_name, order_book, self.sigma, self.spread)
+            self._refresh_maker_taker_input(features)
+            now = time.monotonic() if timestamp is None else timestamp
+            for input_data, was_taker in self.execution_probe.update(order_book, self.mk_input, now):
+                self.calibrator.observe_execution(self.exchange_name, input_data, was_taker)
+
+    def _refresh_maker_taker_input(self, features: BookFeatures):
+        # Book depth near mid relative to the order, in [0, 1): deeper books favour passive fills
+        depth = features.depth_usd()
+        order_book_depth = depth / (depth + self.usd_amount) if depth + self.usd_amount > 0 else 0.0
+        mk_input = self.mk_input
+        if (order_book_depth != mk_input.order_book_depth
+                or features.time_since_change != mk_input.time_since_last_trade):
+            mk_input.order_book_depth = order_book_depth
+            mk_input.time_since_last_trade = features.time_since_change
+            self._maker_taker = None
+
+    def refresh(self):
+        """Bring ``mk_input`` up to date with the current book and calibration; ``evaluate``
+        does this itself, callers reading ``mk_input`` directly must call it first."""
+        if self.calibrator is not None:
+            # Maker/taker weights only move when executions are observed
+            updates = self.calibrator.maker_taker_updates(self.exchange_name)
+            if updates != self._maker_taker_updates:
+                self._maker_taker_updates = updates
+                self._maker_taker = None
+        if self.features is not None:
+            self._refresh_maker_taker_input(self.features)
+
+    def evaluate(self) -> TradeCostResult:
+        key = (self.book_version, self.params_version)
+        if self._result is not None and key == self._result_key:
+            return self._result
+
+        analyzer = self.analyzer
+        self.refresh()
+        if self._maker_taker is None:
+            self._maker_taker = analyzer.estimate_maker_taker(self.mk_input)
+            self._fee = None
+        if self._fee is None:
+            self._fee = analyzer.compute_fee(self.usd_amount, self._maker_taker)
+
+        slippage = analyzer.compute_slippage(self.usd_amount, self.sigma, self.spread, self.exchange_name)
+        market_impact = analyzer.compute_market_impact(self.usd_amount, self.mi_params)
+        net_cost = analyzer.compute_net_cost(NetCostInput(self.usd_amount, slippage, self._fee, market_impact))
+
+        self._result = TradeCostResult(slippage, self._fee, market_impact, net_cost, self._maker_taker)
+        self._result_key = key
+        return self._result
+
+    def on_tick(self, order_book: OrderBook, timestamp: Optional[float] = None) -> TradeCostResult:
+        self.update_book(order_book, timestamp)
+        return self.evaluate()
@@ -0,0 +1,224 @@
+import argparse
+import os
+import re
+import struct
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional
+
+import numpy as np
+
+from core.tick_store import fill_record, record_book, tick_dtype
+from core.trade_analyzer import OrderBook, TradeCostResult
+
+RING_MAGIC = b"TSRING01"
+HEADER_SIZE = 64
+_HEADER = struct.Struct("<8sIIII")  # magic, format version, depth, capacity, writer pid
+_COUNT_OFFSET = 24                  # uint64 records published so far
+FORMAT_VERSION = 2
+
+
+def ring_name(prefix: str, exchange: str, symbol: str) -> str:
+    """Shared memory segment name for one feed, e.g. ``tsim_OKX_BTC-USDT-SWAP``."""
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", f"{prefix}_{exchange}_{symbol}")
+
+
+def slot_dtype(depth: int) -> np.dtype:
+    # Per-slot sequence word for the seqlock, then the same record as the tick store
+    return np.dtype([("seq", "<u8")] + tick_dtype(depth).descr)
+
+
+def _writer_alive(pid: int) -> bool:
+    if pid == 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass    # Exists, but belongs to another user
+    return True
+
+
+def _views(buf, depth: int, capacity: int) -> "tuple[np.ndarray, np.ndarray]":
+    count = np.ndarray((1,), dtype="<u8", buffer=buf, offset=_COUNT_OFFSET)
+    slots = np.ndarray((capacity,), dtype=slot_dtype(depth), buffer=buf, offset=HEADER_SIZE)
+    return count, slots
+
+
+class SharedRingWriter:
+    """Publishes book snapshots and cost results into a shared memory ring.
+
+    Each slot is guarded by a seqlock: its sequence word is odd while the slot is
+    being written and even once it is complete, so readers never block the writer
+    and retry instead of seeing a torn record. There must be a single writer: an
+    existing segment is only replaced if it is a ring whose writer process has exited.
+    """
+
+    def __init__(self, name: str, depth: int = 20, capacity: int = 1024):
+        self.name = name
+        self.depth = depth
+        self.capacity = capacity
+        size = HEADER_SIZE + capacity * slot_dtype(depth).itemsize
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            self._reclaim(name)
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self._shm.buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+        _HEADER.pack_into(self._shm.buf, 0, RING_MAGIC, FORMAT_VERSION, depth, capacity, os.getpid())
+        self._count, self._slots = _views(self._shm.buf, depth, capacity)
+        self._seq = self._slots["seq"]
+        self.count = 0
+
+    @staticmethod
+    def _reclaim(name: str):
+        """Unlink a segment left behind by a writer that did not shut down cleanly, or
+        raise ``FileExistsError`` if it may still be in use."""
+        stale = shared_memory.SharedMemory(name=name)
+        try:
+            magic, version, pid = b"", 0, 0
+            if stale.size >= _HEADER.size:
+                magic, version, _, _, pid = _HEADER.unpack_from(stale.buf, 0)
+            if magic != RING_MAGIC or version != FORMAT_VERSION:
+                error = f"{name} exists and is not a version {FORMAT_VERSION} cost ring"
+            elif _writer_alive(pid):
+                error = f"{name} is in use by writer process {pid}"
+            else:
+                stale.unlink()
+                return
+        finally:
+            stale.close()
+        if pid != os.getpid():
+            # Not ours to remove; stop this process's tracker unlinking it on exit
+            resource_tracker.unregister(stale._name, "shared_memory")
+        raise FileExistsError(error)
+
+    def publish(self, ts_ns: int, order_book: OrderBook, result: Optional[TradeCostResult] = None):
+        index = self.count % self.capacity
+        seq = int(self._seq[index])
+        self._seq[index] = seq + 1
+        record = self._slots[index]
+        record["ts_ns"] = ts_ns
+        fill_record(record, self.depth, order_book, result)
+        self._seq[index] = seq + 2
+        self.count += 1
+        self._count[0] = self.count
+
+    def close(self):
+        if self._shm is None:
+            return
+        del self._count, self._slots, self._seq
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SharedRingReader:
+    """Reads a ring published by ``SharedRingWriter`` in another process on this host.
+
+    Reads copy straight out of shared memory with no deserialization. ``latest`` gives
+    the newest record; ``poll`` gives every record since a cursor and how many were
+    overwritten before they could be read.
+    """
+
+    def __init__(self, name: str, max_retries: int = 1000):
+        self.name = name
+        self.max_retries = max_retries
+        self._shm = shared_memory.SharedMemory(name=name)
+        # The writer owns the segment; stop this process's tracker unlinking it on exit
+        resource_tracker.unregister(self._shm._name, "shared_memory")
+        magic, version, self.depth, self.capacity, _ = _HEADER.unpack_from(self._shm.buf, 0)
+        if magic != RING_MAGIC or version != FORMAT_VERSION:
+            self._shm.close()
+            raise ValueError(f"{name} is not a version {FORMAT_VERSION} cost ring")
+        self._count, self._slots = _views(self._shm.buf, self.depth, self.capacity)
+        self._seq = self._slots["seq"]
+
+    @property
+    def count(self) -> int:
+        return int(self._count[0])
+
+    def _read(self, index: int) -> "tuple[int, Optional[np.ndarray]]":
+        """Consistent copy of ``slot[index]`` and the sequence it was read at."""
+        slot = index % self.capacity
+        for _ in range(self.max_retries):
+            before = int(self._seq[slot])
+            if before & 1:
+                continue
+            record = self._slots[slot:slot + 1].copy()
+            if int(self._seq[slot]) == before:
+                return before, record
+        return -1, None
+
+    def latest(self) -> Optional[np.ndarray]:
+        """The newest complete record as a one-element structured array, or None."""
+        count = self.count
+        if count == 0:
+            return None
+        return self._read(count - 1)[1]
+
+    def latest_book(self) -> Optional[OrderBook]:
+        record = self.latest()
+        return None if record is None else record_book(record[0])
+
+    def poll(self, cursor: int) -> "tuple[np.ndarray, int, int]":
+        """Records published at or after ``cursor``: ``(records, next_cursor, missed)``."""
+        count = self.count
+        start = max(cursor, count - self.capacity)
+        missed = start - cursor
+        records = []
+        for index in range(start, count):
+            seq, record = self._read(index)
+            # Slot k holds generation k // capacity once complete; anything newer means we were lapped
+            if record is None or seq != 2 * (index // self.capacity + 1):
+                missed += 1
+                continue
+            records.append(record)
+        dtype = self._slots.dtype
+        out = np.concatenate(records) if records else np.empty(0, dtype=dtype)
+        return out, count, missed
+
+    def close(self):
+        if self._shm is None:
+            return
+        del self._count, self._slots, self._seq
+        self._shm.close()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tail cost results from a shared memory ring")
+    parser.add_argument("name", help="segment name, e.g. tsim_OKX_BTC-USDT-SWAP")
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between polls")
+    args = parser.parse_args()
+
+    with SharedRingReader(args.name) as reader:
+        cursor = reader.count
+        try:
+            while True:
+                records, cursor, missed = reader.poll(cursor)
+                if records.size:
+                    last = records[-1]
+                    print(f"{records.size} new ({missed} missed) ask {last['ask_px'][0]:.2f} "
+                          f"bid {last['bid_px'][0]:.2f} net cost {last['net_cost']:.4f} "
+                          f"taker {last['taker_prob']:.4f}")
+                time.sleep(args.interval)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+from typing import Any, Optional, Tuple
+
+
+class LatestValueSlot:
+    """Latest-value-wins handoff from one producer thread to one consumer thread.
+
+    The producer replaces a single ``(seq, value)`` tuple, which is an atomic reference
+    swap under the GIL, so neither side takes a lock. The consumer passes back the last
+    sequence number it saw and learns how many values were superseded in between.
+    """
+
+    __slots__ = ("_entry",)
+
+    def __init__(self):
+        self._entry: Tuple[int, Any] = (0, None)
+
+    def publish(self, value: Any):
+        self._entry = (self._entry[0] + 1, value)
+
+    @property
+    def published(self) -> int:
+        return self._entry[0]
+
+    def take(self, last_seq: int) -> Tuple[int, Optional[Any], int]:
+        """Returns ``(seq, value, skipped)``; ``value`` is None if nothing new was published."""
+        seq, value = self._entry
+        if seq <= last_seq:
+            return last_seq, None, 0
+        return seq, value, seq - last_seq - 1
@@ -0,0 +1,170 @@
+import os
+import struct
+from typing import Optional
+
+import numpy as np
+
+from core.trade_analyzer import OrderBook, TradeCostResult
+
+TICK_STORE_MAGIC = b"TSTICK01"
+HEADER_SIZE = 64
+_HEADER = struct.Struct("<8sIIQ")  # magic, format version, depth, record count
+FORMAT_VERSION = 1
+
+COST_FIELDS = ("slippage", "fee", "market_impact", "net_cost", "maker_prob", "taker_prob")
+
+
+def tick_dtype(depth: int) -> np.dtype:
+    """Fixed-width record: receive time, top-``depth`` levels per side and cost outputs."""
+    return np.dtype(
+        [("ts_ns", "<i8")]
+        + [(name, "<f8", (depth,)) for name in ("ask_px", "ask_sz", "bid_px", "bid_sz")]
+        + [(name, "<f8") for name in COST_FIELDS]
+    )
+
+
+def fill_record(record, depth: int, order_book: OrderBook, result: Optional[TradeCostResult] = None):
+    """Write one book snapshot and its costs into a ``tick_dtype`` record in place."""
+    for name, values in (("ask_px", order_book.ask_prices), ("ask_sz", order_book.ask_sizes),
+                         ("bid_px", order_book.bid_prices), ("bid_sz", order_book.bid_sizes)):
+        n = min(depth, values.size)
+        field = record[name]
+        field[:n] = values[:n]
+        field[n:] = np.nan
+    if result is not None:
+        record["slippage"] = result.slippage
+        record["fee"] = result.fee
+        record["market_impact"] = result.market_impact
+        record["net_cost"] = result.net_cost
+        record["maker_prob"] = result.maker_taker_result.maker_prob
+        record["taker_prob"] = result.maker_taker_result.taker_prob
+    else:
+        for name in COST_FIELDS:
+            record[name] = np.nan
+
+
+def record_book(record) -> OrderBook:
+    """The book stored in a ``tick_dtype`` record, without the NaN padding."""
+    ask_valid = ~np.isnan(record["ask_px"])
+    bid_valid = ~np.isnan(record["bid_px"])
+    return OrderBook(
+        record["ask_px"][ask_valid], record["ask_sz"][ask_valid],
+        record["bid_px"][bid_valid], record["bid_sz"][bid_valid],
+    )
+
+
+def _read_header(path: str) -> "tuple[int, int]":
+    with open(path, "rb") as f:
+        magic, version, depth, count = _HEADER.unpack(f.read(_HEADER.size))
+    if magic != TICK_STORE_MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"{path} is not a version {FORMAT_VERSION} tick store")
+    return depth, count
+
+
+class TickStoreWriter:
+    """Appends book snapshots and cost results to a memory-mapped file.
+
+    The record count in the header is only advanced on ``flush``, so concurrent
+    readers never see a partially written record.
+    """
+
+    def __init__(self, path: str, depth: int = 20, chunk_records: int = 65536, flush_every: int = 1024):
+        self.path = path
+        self.chunk_records = chunk_records
+        self.flush_every = flush_every
+
+        if os.path.exists(path) and os.path.getsize(path) >= HEADER_SIZE:
+            self.depth, self.count = _read_header(path)
+            if self.depth != depth:
+                raise ValueError(f"{path} stores depth {self.depth}, not {depth}")
+        else:
+            self.depth, self.count = depth, 0
+            with open(path, "wb") as f:
+                f.write(_HEADER.pack(TICK_STORE_MAGIC, FORMAT_VERSION, depth, 0).ljust(HEADER_SIZE, b"\0"))
+
+        self.dtype = tick_dtype(self.depth)
+        self._records: Optional[np.memmap] = None
+        self._capacity = 0
+        self._unflushed = 0
+        self._reserve(max(self.count, 1))
+
+    def _reserve(self, needed: int):
+        if needed <= self._capacity:
+            return
+        capacity = -(-needed // self.chunk_records) * self.chunk_records
+        if self._records is not None:
+            self._records.flush()
+        with open(self.path, "r+b") as f:
+            f.truncate(HEADER_SIZE + capacity * self.dtype.itemsize)
+        self._records = np.memmap(self.path, dtype=self.dtype, mode="r+", offset=HEADER_SIZE, shape=(capacity,))
+        self._capacity = capacity
+
+    def append(self, ts_ns: int, order_book: OrderBook, result: Optional[TradeCostResult] = None):
+        self._reserve(self.count + 1)
+        record = self._records[self.count]
+        record["ts_ns"] = ts_ns
+        fill_record(record, self.depth, order_book, result)
+
+        self.count += 1
+        self._unflushed += 1
+        if self._unflushed >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        self._records.flush()
+        with open(self.path, "r+b") as f:
+            f.write(_HEADER.pack(TICK_STORE_MAGIC, FORMAT_VERSION, self.depth, self.count))
+        self._unflushed = 0
+
+    def close(self):
+        if self._records is None:
+            return
+        self.flush()
+        self._records = None
+        # Drop the preallocated tail so the file holds exactly ``count`` records
+        with open(self.path, "r+b") as f:
+            f.truncate(HEADER_SIZE + self.count * self.dtype.itemsize)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TickStoreReader:
+    """Zero-copy NumPy views over a tick store; records must be appended in time order."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.records: np.ndarray = np.empty(0)
+        self.refresh()
+
+    def refresh(self):
+        """Re-read the header to pick up records flushed since the store was opened."""
+        self.depth, self.count = _read_header(self.path)
+        self.dtype = tick_dtype(self.depth)
+        if self.count == 0:
+            self.records = np.empty(0, dtype=self.dtype)
+        else:
+            self.records = np.memmap(self.path, dtype=self.dtype, mode="r", offset=HEADER_SIZE, shape=(self.count,))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, key):
+        return self.records[key]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self.records["ts_ns"]
+
+    def time_range(self, start_ns: Optional[int] = None, end_ns: Optional[int] = None) -> np.ndarray:
+        """Records with ``start_ns <= ts_ns < end_ns``, as a view into the mapped file."""
+        ts = self.timestamps
+        lo = 0 if start_ns is None else int(np.searchsorted(ts, start_ns, side="left"))
+        hi = self.count if end_ns is None else int(np.searchsorted(ts, end_ns, side="left"))
+        return self.records[lo:hi]
+
+    def book_at(self, index: int) -> OrderBook:
+        return record_book(self.records[index])
@@ -2,7 +2,12 @@ import math
 import time
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import List
+from functools import cached_property
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from core.fees import FeeRegistry, fee_registry
 
 
 class FeeTier(Enum):
@@ -30,10 +35,119 @@ class OrderLevel:
     price: float
     quantity: float
 
-@dataclass
+
+def _empty_levels() -> np.ndarray:
+    return np.empty(0, dtype=np.float64)
+
+
+def levels_to_arrays(levels: Sequence) -> "tuple[np.ndarray, np.ndarray]":
+    """Convert raw [price, quantity, ...] levels into contiguous price/quantity arrays."""
+    if not levels:
+        return _empty_levels(), _empty_levels()
+    try:
+        # Fast path: every level has the same width, numpy parses the strings in bulk
+        table = np.asarray(levels, dtype=np.float64)
+        if table.ndim != 2 or table.shape[1] < 2:
+            raise ValueError
+    except (ValueError, TypeError):
+        table = np.asarray([level[:2] for level in levels if len(level) >= 2], dtype=np.float64)
+        if table.size == 0:
+            return _empty_levels(), _empty_levels()
+    return np.ascontiguousarray(table[:, 0]), np.ascontiguousarray(table[:, 1])
+
+
+@dataclass(eq=False)
 class OrderBook:
-    asks: List[OrderLevel] = field(default_factory=list)
-    bids: List[OrderLevel] = field(default_factory=list)
+    """Columnar L2 book: asks ascending and bids descending by price."""
+    ask_prices: np.ndarray = field(default_factory=_empty_levels)
+    ask_sizes: np.ndarray = field(default_factory=_empty_levels)
+    bid_prices: np.ndarray = field(default_factory=_empty_levels)
+    bid_sizes: np.ndarray = field(default_factory=_empty_levels)
+
+    @classmethod
+    def from_levels(cls, asks: Sequence, bids: Sequence) -> "OrderBook":
+        ask_prices, ask_sizes = levels_to_arrays(asks)
+        bid_prices, bid_sizes = levels_to_arrays(bids)
+        return cls(ask_prices, ask_sizes, bid_prices, bid_sizes)
+
+    # Lazy OrderLevel views for callers that still iterate levels
+    @cached_property
+    def asks(self) -> List[OrderLevel]:
+        return [OrderLevel(p, q) for p, q in zip(self.ask_prices.tolist(), self.ask_sizes.tolist())]
+
+    @cached_property
+    def bids(self) -> List[OrderLevel]:
+        return [OrderLevel(p, q) for p, q in zip(self.bid_prices.tolist(), self.bid_sizes.tolist())]
+
+    def is_empty(self) -> bool:
+        return self.ask_prices.size == 0 or self.bid_prices.size == 0
+
+    def top_ask(self) -> Optional[OrderLevel]:
+        if self.ask_prices.size == 0:
+            return None
+        return OrderLevel(float(self.ask_prices[0]), float(self.ask_sizes[0]))
+
+    def top_bid(self) -> Optional[OrderLevel]:
+        if self.bid_prices.size == 0:
+            return None
+        return OrderLevel(float(self.bid_prices[0]), float(self.bid_sizes[0]))
+
+    def mid_price(self) -> float:
+        if self.is_empty():
+            return 0.0
+        return (float(self.ask_prices[0]) + float(self.bid_prices[0])) / 2.0
+
+    # Cumulative quantity/notional per side, computed once per book instance
+    @cached_property
+    def ask_depth(self) -> "tuple[np.ndarray, np.ndarray]":
+        return np.cumsum(self.ask_sizes), np.cumsum(self.ask_prices * self.ask_sizes)
+
+    @cached_property
+    def bid_depth(self) -> "tuple[np.ndarray, np.ndarray]":
+        return np.cumsum(self.bid_sizes), np.cumsum(self.bid_prices * self.bid_sizes)
+
+    def side_arrays(self, side: "OrderSide") -> "tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]":
+        """Levels consumed by an order on ``side``: prices, sizes, cumulative qty and notional."""
+        if side == OrderSide.BUY:
+            return (self.ask_prices, self.ask_sizes) + self.ask_depth
+        return (self.bid_prices, self.bid_sizes) + self.bid_depth
+
+@dataclass(slots=True)
+class FillResult:
+    usd_amount: float
+    filled_usd: float
+    filled_qty: float
+    avg_price: float
+    levels_consumed: int
+    slippage: float         # Percent away from mid, positive is worse for the taker
+    fully_filled: bool
+
+
+def walk_book(order_book: OrderBook, usd_amounts, side: OrderSide) -> "tuple[np.ndarray, np.ndarray, np.ndarray]":
+    """Simulate market fills of ``usd_amounts`` against the book.
+
+    Uses the book's cumulative notional so each amount is a binary search instead of a
+    level-by-level scan. Returns filled notional, filled quantity and levels consumed.
+    """
+    amounts = np.asarray(usd_amounts, dtype=np.float64)
+    prices, sizes, cum_qty, cum_notional = order_book.side_arrays(side)
+    n = prices.size
+    if n == 0:
+        zeros = np.zeros_like(amounts)
+        return zeros, zeros, np.zeros(amounts.shape, dtype=np.int64)
+
+    idx = np.searchsorted(cum_notional, amounts, side="left")
+    partial = np.minimum(idx, n - 1)
+    prev = partial - 1
+    prev_notional = np.where(prev >= 0, cum_notional[prev], 0.0)
+    prev_qty = np.where(prev >= 0, cum_qty[prev], 0.0)
+
+    exhausted = idx >= n
+    filled_usd = np.where(exhausted, cum_notional[-1], amounts)
+    filled_qty = np.where(exhausted, cum_qty[-1], prev_qty + (amounts - prev_notional) / prices[partial])
+    levels = np.minimum(idx + 1, n)
+    return filled_usd, filled_qty, levels
+
 
 @dataclass
 class MakerTakerInput:
@@ -43,12 +157,38 @@ class MakerTakerInput:
     time_since_last_trade: float
 
 
-@dataclass
+@dataclass(slots=True)
 class MakerTakerResult:
     maker_prob: float
     taker_prob: float
 
 
+@dataclass
+class SlippageCoefficients:
+    """Linear slippage model: beta0 + beta1 * log(usd) + beta2 * volatility + beta3 * spread."""
+    beta0: float = 0.01     # base slippage
+    beta1: float = 0.12     # log(order size)
+    beta2: float = 0.6      # volatility weight
+    beta3: float = 0.25     # spread weight
+
+    def as_tuple(self) -> "tuple[float, float, float, float]":
+        return self.beta0, self.beta1, self.beta2, self.beta3
+
+
+@dataclass
+class MakerTakerWeights:
+    """Logistic taker probability weights."""
+    w_market: float = 2.0
+    w_volatility: float = 1.5
+    w_depth: float = -1.0
+    w_time: float = -0.5
+    bias: float = 0.0
+
+
+DEFAULT_SLIPPAGE = SlippageCoefficients()
+DEFAULT_MAKER_TAKER = MakerTakerWeights()
+
+
 @dataclass
 class NetCostInput:
     usd_amount: float
@@ -57,7 +197,7 @@ class NetCostInput:
     market_impact: float
 
 
-@dataclass
+@dataclass(slots=True)
 class TradeCostResult:
     slippage: float
     fee: float
@@ -66,19 +206,43 @@ class TradeCostResult:
     maker_taker_result: MakerTakerResult
 
 
+@dataclass(eq=False)
+class BatchCostResult:
+    """Cost grid with shape (len(usd_amounts), len(fee_tiers), len(mi_params))."""
+    usd_amounts: np.ndarray
+    fee_tiers: List[FeeTier]
+    slippage: np.ndarray
+    fee: np.ndarray
+    market_impact: np.ndarray
+    net_cost: np.ndarray
+    maker_prob: np.ndarray
+    taker_prob: np.ndarray
+
+
 class TradeAnalyzer:
-    def __init__(self, order_book, exchange_name: str, fee_tier: FeeTier):
+    def __init__(self, order_book, exchange_name: str, fee_tier: FeeTier, symbol: Optional[str] = None,
+                 fees: Optional[FeeRegistry] = None):
         self.order_book = order_book
-        self.exchange_name = exchange_name
         self.fee_tier = fee_tier
+        self.fees = fees or fee_registry()
+        self.set_instrument(exchange_name, symbol)
+        # Per-exchange overrides, e.g. from an online calibrator; defaults otherwise
+        self.slippage_models: Dict[str, SlippageCoefficients] = {}
+        self.maker_taker_models: Dict[str, MakerTakerWeights] = {}
+
+    def set_instrument(self, exchange_name: str, symbol: Optional[str] = None):
+        # Venue and instrument are resolved to a fee table here, never per tick
+        self.exchange_name = exchange_name
+        self.symbol = symbol
+        self.fee_schedule = self.fees.schedule(exchange_name, symbol)
 
     def get_order_book(self):
         return self.order_book
 
     def compute_spread(self) -> float:
-        if not self.order_book.bids or not self.order_book.asks:
+        if self.order_book.is_empty():
             return 0.0
-        return self.order_book.asks[0].price - self.order_book.bids[0].price
+        return float(self.order_book.ask_prices[0] - self.order_book.bid_prices[0])
 
     def compute_market_impact(self, usd_qty: float, params: MarketImpactParams) -> float:
         temp_impact = params.eta * usd_qty ** params.alpha
@@ -87,37 +251,56 @@ class TradeAnalyzer:
         return temp_impact + perm_impact + execution_risk
 
 
-    def compute_slippage(self, usd_amount: float, volatility: float, spread: float, exchange: str) -> float:
-        # Dummy linear regression coefficients for OKX
-        beta0 = 0.01  # base slippage
-        beta1 = 0.12  # log(order size)
-        beta2 = 0.6   # volatility weight
-        beta3 = 0.25  # spread weight
-
-        # Customize for other exchanges if needed
-        # if exchange == "BINANCE":
-        #     beta0, beta1, beta2, beta3 = ...
+    def slippage_coefficients(self, exchange: str) -> "tuple[float, float, float, float]":
+        return self.slippage_models.get(exchange, DEFAULT_SLIPPAGE).as_tuple()
 
+    def compute_slippage(self, usd_amount: float, volatility: float, spread: float, exchange: str) -> float:
+        beta0, beta1, beta2, beta3 = self.slippage_coefficients(exchange)
         log_order = math.log(usd_amount)
         return beta0 + beta1 * log_order + beta2 * volatility + beta3 * spread
 
+    def compute_fill_slippage(self, usd_amounts, side: OrderSide = OrderSide.BUY) -> np.ndarray:
+        """Depth-walked slippage in percent from mid for one or many order sizes."""
+        mid = self.order_book.mid_price()
+        filled_usd, filled_qty, _ = walk_book(self.order_book, usd_amounts, side)
+        if mid <= 0.0:
+            return np.zeros_like(filled_usd)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            avg_price = np.where(filled_qty > 0, filled_usd / filled_qty, mid)
+        sign = 1.0 if side == OrderSide.BUY else -1.0
+        return sign * (avg_price - mid) / mid * 100.0
+
+    def simulate_fill(self, usd_amount: float, side: OrderSide = OrderSide.BUY) -> FillResult:
+        filled_usd, filled_qty, levels = walk_book(self.order_book, usd_amount, side)
+        filled_usd, filled_qty = float(filled_usd), float(filled_qty)
+        mid = self.order_book.mid_price()
+        avg_price = filled_usd / filled_qty if filled_qty > 0 else mid
+        sign = 1.0 if side == OrderSide.BUY else -1.0
+        slippage = sign * (avg_price - mid) / mid * 100.0 if mid > 0 else 0.0
+        return FillResult(
+            usd_amount=usd_amount,
+            filled_usd=filled_usd,
+            filled_qty=filled_qty,
+            avg_price=avg_price,
+            levels_consumed=int(levels),
+            slippage=slippage,
+            fully_filled=filled_usd >= usd_amount,
+        )
+
     @staticmethod
     def _sigmoid(x: float) -> float:
         return 1.0 / (1.0 + math.exp(-x))
 
-    @staticmethod
-    def get_taker_fee_percent(tier: FeeTier) -> float:
-        if tier == FeeTier.TIER1:
-            return 0.001
-        elif tier == FeeTier.TIER2:
-            return 0.0005
-        elif tier == FeeTier.TIER3:
-            return 0.0001
-        return 0.001
-
-    def compute_fee(self, usd_amount: float) -> float:
-        fee_percent = self.get_taker_fee_percent(self.fee_tier)
-        return usd_amount * fee_percent
+    def get_taker_fee_percent(self, tier: FeeTier) -> float:
+        return self.fee_schedule.rates[tier.value - 1][1]
+
+    def get_maker_fee_percent(self, tier: FeeTier) -> float:
+        return self.fee_schedule.rates[tier.value - 1][0]
+
+    def compute_fee(self, usd_amount: float, maker_taker: MakerTakerResult) -> float:
+        """Expected fee, blending maker and taker rates by their fill probabilities."""
+        maker, taker = self.fee_schedule.rates[self.fee_tier.value - 1]
+        return usd_amount * (maker_taker.maker_prob * maker + maker_taker.taker_prob * taker)
 
     def compute_market_impact(self, usd_qty: float, params: MarketImpactParams) -> float:
         temporary_impact = params.eta * usd_qty
@@ -125,7 +308,7 @@ class TradeAnalyzer:
         execution_risk = 0.5 * params.lambda_ * (params.sigma ** 2) * (usd_qty ** 2)
         return temporary_impact + permanent_impact + execution_risk
     
-    def compute_volatility(self, prices: List[float]) -> float:
+    def compute_volatility(self, prices: Sequence[float]) -> float:
         if len(prices) < 2:
             return 0.0
         log_returns = [math.log(prices[i] / prices[i - 1]) for i in range(1, len(prices))]
@@ -135,16 +318,13 @@ class TradeAnalyzer:
 
 
     def estimate_maker_taker(self, input_data: MakerTakerInput) -> MakerTakerResult:
-        w_market = 2.0
-        w_volatility = 1.5
-        w_depth = -1.0
-        w_time = -0.5
+        weights = self.maker_taker_models.get(self.exchange_name, DEFAULT_MAKER_TAKER)
 
-        score = 0.0
-        score += w_market * (1.0 if input_data.is_market_order else 0.0)
-        score += w_volatility * input_data.volatility
-        score += w_depth * input_data.order_book_depth
-        score += w_time * input_data.time_since_last_trade
+        score = weights.bias
+        score += weights.w_market * (1.0 if input_data.is_market_order else 0.0)
+        score += weights.w_volatility * input_data.volatility
+        score += weights.w_depth * input_data.order_book_depth
+        score += weights.w_time * input_data.time_since_last_trade
 
         taker_prob = self._sigmoid(score)
         maker_prob = 1.0 - taker_prob
@@ -156,20 +336,61 @@ class TradeAnalyzer:
 
     def analyze(self, order_book, usd_amount: float, fee_tier: FeeTier,
                 mi_params: MarketImpactParams, mk_input: MakerTakerInput,
-                recent_prices: List[float], exchange_name: str) -> TradeCostResult:
+                recent_prices: Sequence[float], exchange_name: str,
+                volatility: Optional[float] = None) -> TradeCostResult:
         self.order_book = order_book
         self.fee_tier = fee_tier
-        self.exchange_name = exchange_name
+        if exchange_name != self.exchange_name:
+            self.set_instrument(exchange_name, self.symbol)
 
         spread = self.compute_spread()
-        volatility = self.compute_volatility(recent_prices)
+        if volatility is None:
+            volatility = self.compute_volatility(recent_prices)
         slippage = self.compute_slippage(usd_amount, volatility, spread, exchange_name)
-        fee = self.compute_fee(usd_amount)
+        maker_taker_result = self.estimate_maker_taker(mk_input)
+        fee = self.compute_fee(usd_amount, maker_taker_result)
         market_impact = self.compute_market_impact(usd_amount, mi_params)
 
         net_input = NetCostInput(usd_amount, slippage, fee, market_impact)
         net_cost = self.compute_net_cost(net_input)
 
-        maker_taker_result = self.estimate_maker_taker(mk_input)
-
         return TradeCostResult(slippage, fee, market_impact, net_cost, maker_taker_result)
+
+    def analyze_batch(self, usd_amounts, fee_tiers: Sequence[FeeTier],
+                      mi_params: Sequence[MarketImpactParams], mk_input: MakerTakerInput,
+                      volatility: float, spread: Optional[float] = None) -> BatchCostResult:
+        """Evaluate the cost model over a grid of order sizes, fee tiers and impact parameters.
+
+        Matches ``analyze`` element-wise but computes the whole grid with one set of
+        broadcast array operations.
+        """
+        if spread is None:
+            spread = self.compute_spread()
+        amounts = np.asarray(usd_amounts, dtype=np.float64).reshape(-1, 1, 1)
+        fee_tiers = list(fee_tiers)
+        tier_index = np.array([t.value - 1 for t in fee_tiers], dtype=np.intp)
+        maker_taker = self.estimate_maker_taker(mk_input)
+        fee_rates = (maker_taker.maker_prob * self.fee_schedule.maker[tier_index]
+                     + maker_taker.taker_prob * self.fee_schedule.taker[tier_index]).reshape(1, -1, 1)
+        eta = np.array([p.eta for p in mi_params], dtype=np.float64).reshape(1, 1, -1)
+        gamma = np.array([p.gamma for p in mi_params], dtype=np.float64).reshape(1, 1, -1)
+        lambda_ = np.array([p.lambda_ for p in mi_params], dtype=np.float64).reshape(1, 1, -1)
+        sigma = np.array([p.sigma for p in mi_params], dtype=np.float64).reshape(1, 1, -1)
+
+        beta0, beta1, beta2, beta3 = self.slippage_coefficients(self.exchange_name)
+        slippage = beta0 + beta1 * np.log(amounts) + beta2 * volatility + beta3 * spread
+        fee = amounts * fee_rates
+        market_impact = (eta + gamma) * amounts + 0.5 * lambda_ * sigma ** 2 * amounts ** 2
+        net_cost = slippage + fee + market_impact
+
+        shape = net_cost.shape
+        return BatchCostResult(
+            usd_amounts=amounts.ravel(),
+            fee_tiers=fee_tiers,
+            slippage=np.broadcast_to(slippage, shape),
+            fee=np.broadcast_to(fee, shape),
+            market_impact=np.broadcast_to(market_impact, shape),
+            net_cost=net_cost,
+            maker_prob=np.full(shape, maker_taker.maker_prob),
+            taker_prob=np.full(shape, maker_taker.taker_prob),
+        )
@@ -0,0 +1,148 @@
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Optional
+
+
+class VolatilityEstimator(ABC):
+    """Streaming estimate of log-return volatility, updated one price at a time."""
+
+    def __init__(self):
+        self._last_price: Optional[float] = None
+
+    def update(self, price: float, timestamp: Optional[float] = None) -> float:
+        if price <= 0.0:
+            return self.value
+        last = self._last_price
+        self._last_price = price
+        if last is not None:
+            self._add_return(math.log(price / last), time.monotonic() if timestamp is None else timestamp)
+        return self.value
+
+    @abstractmethod
+    def _add_return(self, log_return: float, timestamp: float):
+        ...
+
+    @property
+    @abstractmethod
+    def value(self) -> float:
+        ...
+
+    def reset(self):
+        self._last_price = None
+
+
+class _WindowedWelford(VolatilityEstimator):
+    """Welford running mean/variance with removal of returns leaving the window."""
+
+    def __init__(self):
+        super().__init__()
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def _push(self, x: float):
+        self._count += 1
+        delta = x - self._mean
+        self._mean += delta / self._count
+        self._m2 += delta * (x - self._mean)
+
+    def _pop(self, x: float):
+        self._count -= 1
+        if self._count == 0:
+            self._mean = 0.0
+            self._m2 = 0.0
+            return
+        delta = x - self._mean
+        self._mean -= delta / self._count
+        self._m2 -= delta * (x - self._mean)
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def value(self) -> float:
+        if self._count == 0:
+            return 0.0
+        # Population variance, matching TradeAnalyzer.compute_volatility
+        return math.sqrt(max(self._m2, 0.0) / self._count)
+
+    def reset(self):
+        super().reset()
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+
+class RollingVolatility(_WindowedWelford):
+    """Volatility over the last ``window`` prices (``window - 1`` log returns)."""
+
+    def __init__(self, window: int = 50):
+        super().__init__()
+        if window < 2:
+            raise ValueError("window must hold at least two prices")
+        self.window = window
+        self._returns = deque()
+
+    def _add_return(self, log_return: float, timestamp: float):
+        self._returns.append(log_return)
+        self._push(log_return)
+        if len(self._returns) > self.window - 1:
+            self._pop(self._returns.popleft())
+
+    def reset(self):
+        super().reset()
+        self._returns.clear()
+
+
+class TimeWindowVolatility(_WindowedWelford):
+    """Volatility of the log returns observed within the last ``window_seconds``."""
+
+    def __init__(self, window_seconds: float = 60.0):
+        super().__init__()
+        self.window_seconds = window_seconds
+        self._returns = deque()
+
+    def _add_return(self, log_return: float, timestamp: float):
+        self._returns.append((timestamp, log_return))
+        self._push(log_return)
+        cutoff = timestamp - self.window_seconds
+        while self._returns and self._returns[0][0] < cutoff:
+            self._pop(self._returns.popleft()[1])
+
+    def reset(self):
+        super().reset()
+        self._returns.clear()
+
+
+class EwmaVolatility(VolatilityEstimator):
+    """Exponentially weighted volatility; ``halflife`` is measured in ticks."""
+
+    def __init__(self, halflife: float = 20.0):
+        super().__init__()
+        self.alpha = 1.0 - 0.5 ** (1.0 / halflife)
+        self._mean = 0.0
+        self._var = 0.0
+        self._initialized = False
+
+    def _add_return(self, log_return: float, timestamp: float):
+        if not self._initialized:
+            self._mean = log_return
+            self._initialized = True
+            return
+        diff = log_return - self._mean
+        incr = self.alpha * diff
+        self._mean += incr
+        self._var = (1.0 - self.alpha) * (self._var + diff * incr)
+
+    @property
+    def value(self) -> float:
+        return math.sqrt(self._var)
+
+    def reset(self):
+        super().reset()
+        self._mean = 0.0
+        self._var = 0.0
+        self._initialized = False
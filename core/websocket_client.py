@@ -1,18 +1,30 @@
 import asyncio
-import json
-import ssl
-from collections import deque
-import time
 from PyQt6.QtCore import QObject, pyqtSignal, QThread
 
-from core.trade_analyzer import TradeAnalyzer, OrderBook, OrderLevel, MarketImpactParams, FeeTier, MakerTakerInput
+from core.feed_manager import FeedKey, FeedManager, FeedUpdate
+from core.history import SeriesRing
+from core.market_data import WebSocketSource
+from core.slot import LatestValueSlot
+from core.trade_analyzer import FeeTier
+
+
+def _key_from_target(target: str) -> FeedKey:
+    # e.g. /ws/l2-orderbook/okx/BTC-USDT-SWAP
+    parts = [p for p in target.split("/") if p]
+    if len(parts) >= 2:
+        return FeedKey(parts[-2].upper(), parts[-1])
+    return FeedKey("OKX", target.strip("/"))
 
 
 class WebSocketWorker(QObject):
-    result_signal = pyqtSignal(dict)
+    """Runs a FeedManager in a QThread and publishes each feed's latest update into a
+    ``LatestValueSlot`` for the GUI to poll, instead of queueing a signal per tick."""
+
     finished = pyqtSignal()
 
-    def __init__(self, host, port, target, usd_amount=100.0, fee_tier=FeeTier.TIER1, volatility=0.6):
+    def __init__(self, host, port, target, usd_amount=100.0, fee_tier=FeeTier.TIER1, volatility=0.6,
+                 decoder="auto", source=None, record_path=None, tick_store_path=None, feeds=(), shm_prefix=None,
+                 pipeline=None, fees=None):
         super().__init__()
         self.host = host
         self.port = port
@@ -20,8 +32,33 @@ class WebSocketWorker(QObject):
         self.usd_amount = usd_amount
         self.fee_tier = fee_tier
         self.volatility = volatility
-        self.recent_prices = deque(maxlen=50)
-        self._running = True
+
+        # The primary feed comes from host/port/target (or an explicit source); ``feeds`` adds
+        # further EXCHANGE:SYMBOL subscriptions that share the same event loop.
+        self.manager = FeedManager(decoder=decoder, shm_prefix=shm_prefix, pipeline=pipeline, fees=fees)
+        primary = _key_from_target(target)
+        self.primary_key = self.manager.add_feed(
+            primary.exchange,
+            primary.symbol,
+            source=source if source is not None else WebSocketSource(f"wss://{host}:{port}{target}"),
+            usd_amount=usd_amount,
+            fee_tier=fee_tier,
+            volatility=volatility,
+            record_path=record_path,
+            tick_store_path=tick_store_path
+        )
+        for feed in feeds:
+            key = feed if isinstance(feed, FeedKey) else FeedKey.parse(feed)
+            self.manager.add_feed(key.exchange, key.symbol, usd_amount=usd_amount,
+                                  fee_tier=fee_tier, volatility=volatility)
+        self.slots = {key: LatestValueSlot() for key in self.manager.feeds}
+        # Every tick's costs, including those the GUI coalesces away
+        self.histories = {key: SeriesRing() for key in self.manager.feeds}
+        self.manager.subscribe(self._on_update)
+
+    @property
+    def session(self):
+        return self.manager.state(self.primary_key).session
 
     def set_parameters(self, usd_amount=None, fee_tier=None, volatility=None):
         """Update parameters from the UI."""
@@ -31,115 +68,37 @@ class WebSocketWorker(QObject):
             self.fee_tier = fee_tier
         if volatility is not None:
             self.volatility = volatility
+        self.manager.set_parameters(usd_amount, fee_tier, volatility)
 
-    async def connect(self):
-        import websockets
-        uri = f"wss://{self.host}:{self.port}{self.target}"
-        ssl_context = ssl.create_default_context()
-
-        last_message_time = None  # for measuring stream latency
-
-        async with websockets.connect(uri, ssl=ssl_context) as websocket:
-            while self._running:
-                try:
-                    message = await websocket.recv()
-                    current_time = time.perf_counter()
-
-                    # Measure stream data latency
-                    if last_message_time is not None:
-                        stream_latency_ms = (current_time - last_message_time) * 1000
-                    else:
-                        stream_latency_ms = 0.0  # first message, no latency to compare
-
-                    last_message_time = current_time
-
-                    start_process = time.perf_counter()  # start timing data processing
-                    data = json.loads(message)
-
-                    if 'asks' not in data or 'bids' not in data:
-                        continue
-
-                    order_book = OrderBook()
-                    for ask in data['asks']:
-                        if len(ask) >= 2:
-                            price = float(ask[0])
-                            quantity = float(ask[1])
-                            order_book.asks.append(OrderLevel(price, quantity))
-                    for bid in data['bids']:
-                        if len(bid) >= 2:
-                            price = float(bid[0])
-                            quantity = float(bid[1])
-                            order_book.bids.append(OrderLevel(price, quantity))
-
-                    if order_book.asks and order_book.bids:
-                        top_ask = order_book.asks[0]
-                        top_bid = order_book.bids[0]
-                        mid_price = (top_ask.price + top_bid.price) / 2.0
-                        self.recent_prices.append(mid_price)
-
-                        mk_input = MakerTakerInput(
-                            is_market_order=True,
-                            volatility=self.volatility,
-                            order_book_depth=0.4,
-                            time_since_last_trade=0.3
-                        )
-
-                        analyzer = TradeAnalyzer(order_book, exchange_name="OKX", fee_tier=self.fee_tier)
-
-                        spread = analyzer.compute_spread()
-                        sigma = analyzer.compute_volatility(self.recent_prices)
-
-                        # Estimate eta, gamma, lambda based on live data
-                        eta = 0.0001 + 0.05 * spread         # Temporary market impact scaling with spread
-                        gamma = eta * 0.25                   # Permanent market impact scaled from eta
-                        lambda_ = 0.05 + 0.1 * sigma         # Risk aversion scaled from volatility
-
-                        mi_params = MarketImpactParams(
-                            eta=eta,
-                            gamma=gamma,
-                            lambda_=lambda_,
-                            sigma=sigma,
-                            alpha=1.0,  # Can tune these further if you want power-law style
-                            beta=1.0
-                        )
-                        result = analyzer.analyze(
-                            order_book,
-                            self.usd_amount,
-                            self.fee_tier,
-                            mi_params,
-                            mk_input,
-                            list(self.recent_prices),
-                            "OKX"
-                        )
-
-                        end_process = time.perf_counter()
-                        processing_latency_ms = (end_process - start_process) * 1000
-
-                        print(f"[Stream Data Latency] {stream_latency_ms:.3f} ms")
-                        print(f"[Data Processing Latency] {processing_latency_ms:.3f} ms")
-                        print(top_ask, top_bid)
-
-                        self.result_signal.emit({
-                            "top_ask": top_ask,
-                            "top_bid": top_bid,
-                            "slippage": result.slippage,
-                            "fee": result.fee,
-                            "impact": result.market_impact,
-                            "net_cost": result.net_cost,
-                            "maker_prob": result.maker_taker_result.maker_prob,
-                            "taker_prob": result.maker_taker_result.taker_prob,
-                            "stream_latency_ms": stream_latency_ms,
-                            "processing_latency_ms": processing_latency_ms,
-                        })
-
-                except Exception as e:
-                    print(f"WebSocket error: {e}")
-                    break
+    def slot(self, key: FeedKey):
+        return self.slots.get(key)
 
+    def history(self, key: FeedKey):
+        return self.histories.get(key)
+
+    @property
+    def latency(self):
+        return self.manager.latency
+
+    def _on_update(self, update: FeedUpdate):
+        slot = self.slots.get(update.key)
+        if slot is None:
+            # A feed added to the manager after this worker was built; the history goes in
+            # first so the GUI never sees a slot without one
+            self.histories[update.key] = SeriesRing()
+            slot = self.slots[update.key] = LatestValueSlot()
+        self.histories[update.key].append_result(update.recv_time, update.result)
+        slot.publish(update)
+
+    async def connect(self):
+        try:
+            await self.manager.run()
+        except Exception as e:
+            print(f"WebSocket error: {e}")
         self.finished.emit()
 
     def run(self):
         asyncio.run(self.connect())
 
     def stop(self):
-        self._running = False
+        self.manager.stop()
@@ -1,18 +1,21 @@
 import asyncio
-import sys
-from PyQt6.QtCore import QCoreApplication, QThread
-from core.websocket_client import WebSocketWorker
+from core.feed_manager import FeedManager
 
-def print_result(result):
-    print("Received WebSocket Result:")
-    for key, value in result.items():
-        print(f"  {key} {value}")
+def print_result(update):
+    result = update.result
+    print(f"Received {update.key} result:")
+    print(f"  slippage {result.slippage}")
+    print(f"  fee {result.fee}")
+    print(f"  impact {result.market_impact}")
+    print(f"  net_cost {result.net_cost}")
+    print(f"  processing_ms {update.processing_latency_ms:.3f}")
     print("-" * 40)
 
+async def main():
+    manager = FeedManager()
+    manager.add_feed("OKX", "BTC-USDT-SWAP")
+    async for update in manager.stream():
+        print_result(update)
+
 if __name__ == "__main__":
-    worker = WebSocketWorker(
-        host="ws.gomarket-cpp.goquant.io",
-        port="443",
-        target="/ws/l2-orderbook/okx/BTC-USDT-SWAP"
-    )
-    asyncio.run(worker.run())
\ No newline at end of file
+    asyncio.run(main())
@@ -0,0 +1,61 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from PyQt6.QtCore import QObject, QTimer
+
+from core.slot import LatestValueSlot
+
+
+@dataclass
+class BridgeStats:
+    frames: int = 0             # Renders performed
+    idle_frames: int = 0        # Timer ticks with nothing new to render
+    coalesced_frames: int = 0   # Renders that absorbed more than one tick
+    dropped_ticks: int = 0      # Ticks superseded before they could be rendered
+
+
+class UiUpdateBridge(QObject):
+    """Polls a worker's ``LatestValueSlot`` from the GUI thread at a fixed frame rate.
+
+    ``slot_provider`` returns the slot to display (or None), so switching instruments
+    only changes which slot is polled. ``render`` receives the newest value only.
+    """
+
+    def __init__(self, slot_provider: Callable[[], Optional[LatestValueSlot]],
+                 render: Callable[[object], None], fps: float = 30.0, parent=None):
+        super().__init__(parent)
+        self.slot_provider = slot_provider
+        self.render = render
+        self.stats = BridgeStats()
+        self._last_seq: Dict[LatestValueSlot, int] = {}
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.poll)
+        self.set_fps(fps)
+
+    def set_fps(self, fps: float):
+        self._timer.setInterval(max(1, int(1000.0 / fps)))
+
+    def start(self):
+        self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+
+    def poll(self):
+        slot = self.slot_provider()
+        if slot is None:
+            self.stats.idle_frames += 1
+            return
+        last_seq = self._last_seq.get(slot)
+        seq, value, skipped = slot.take(last_seq or 0)
+        if last_seq is None:
+            skipped = 0  # Ticks from before this slot was first displayed are not drops
+        if value is None:
+            self.stats.idle_frames += 1
+            return
+        self._last_seq[slot] = seq
+        self.stats.frames += 1
+        if skipped:
+            self.stats.coalesced_frames += 1
+            self.stats.dropped_ticks += skipped
+        self.render(value)
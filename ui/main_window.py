@@ -2,21 +2,36 @@ import sys
 import time
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
-    QLabel, QComboBox, QLineEdit, QGroupBox, QSizePolicy, QPushButton
+    QLabel, QComboBox, QLineEdit, QGroupBox, QSizePolicy, QPushButton, QFileDialog, QScrollArea
 )
-from PyQt6.QtCore import Qt, QThread
+from PyQt6.QtCore import Qt, QThread, QTimer
 from PyQt6.QtGui import QDoubleValidator
+from core.feed_manager import FeedKey
+from core.latency import STAGES
+from core.market_data import ReplaySource
 from core.websocket_client import WebSocketWorker
 from core.trade_analyzer import FeeTier
+from ui.bridge import UiUpdateBridge
+from ui.widgets import CostHistoryChart, DepthChart, DepthLadder
 
 
 class MainWindow(QWidget):
-    def __init__(self):
+    def __init__(self, replay_path=None, replay_speed=1.0, record_path=None, tick_store_path=None, feeds=(),
+                 ui_fps=30.0, shm_prefix=None, pipeline=None, fees=None):
         super().__init__()
         self.setWindowTitle("Trade Execution Simulator")
         self.setMinimumSize(900, 600)
         self.thread = None
         self.worker = None
+        self.replay_path = replay_path
+        self.replay_speed = replay_speed
+        self.record_path = record_path
+        self.tick_store_path = tick_store_path
+        self.shm_prefix = shm_prefix
+        self.pipeline = pipeline
+        self.fees = fees
+        self.feeds = list(feeds)
+        self._label_text = {}
 
         main_layout = QVBoxLayout()
         main_layout.setContentsMargins(20, 20, 20, 20)
@@ -53,11 +68,10 @@ class MainWindow(QWidget):
 
         label_style = "font-size: 14px;"
 
+        # Populated from the feeds tracked by the worker
         self.exchange_input = QComboBox()
-        self.exchange_input.addItems(["OKX"])
-
         self.asset_input = QComboBox()
-        self.asset_input.addItems(["BTC/USDT"])
+        self.exchange_input.currentTextChanged.connect(self.update_asset_input)
 
         self.order_type_input = QComboBox()
         self.order_type_input.addItems(["Market"])
@@ -112,6 +126,8 @@ class MainWindow(QWidget):
         self.impact_label = QLabel("$0.00")
         self.net_cost_label = QLabel("$0.00")
         self.maker_taker_label = QLabel("Maker: 0.0000 | Taker: 0.0000")
+        self.microprice_label = QLabel("$0.00")
+        self.imbalance_label = QLabel("0.000 | 0.000")
 
         output_layout.addWidget(QLabel("Top Ask:"), 0, 0, alignment=Qt.AlignmentFlag.AlignRight)
         output_layout.addWidget(self.top_ask, 0, 1)
@@ -127,8 +143,12 @@ class MainWindow(QWidget):
         output_layout.addWidget(self.net_cost_label, 5, 1)
         output_layout.addWidget(QLabel("Maker/Taker Ratio:"), 6, 0, alignment=Qt.AlignmentFlag.AlignRight)
         output_layout.addWidget(self.maker_taker_label, 6, 1)
+        output_layout.addWidget(QLabel("Microprice:"), 7, 0, alignment=Qt.AlignmentFlag.AlignRight)
+        output_layout.addWidget(self.microprice_label, 7, 1)
+        output_layout.addWidget(QLabel("Imbalance (Top | 10 bps):"), 8, 0, alignment=Qt.AlignmentFlag.AlignRight)
+        output_layout.addWidget(self.imbalance_label, 8, 1)
 
-        for row in range(7):
+        for row in range(9):
             for col in [0, 1]:
                 item = output_layout.itemAtPosition(row, col)
                 if item and item.widget():
@@ -142,6 +162,36 @@ class MainWindow(QWidget):
         content_layout.addWidget(output_group, stretch=1)
         main_layout.addLayout(content_layout)
 
+        # ========== ORDER BOOK GROUP ==========
+        book_group = QGroupBox("Order Book")
+        book_group.setStyleSheet(input_group.styleSheet())
+        book_layout = QHBoxLayout()
+        self.depth_ladder = DepthLadder(levels=400)
+        self.ladder_scroll = QScrollArea()
+        self.ladder_scroll.setWidget(self.depth_ladder)
+        self.ladder_scroll.setWidgetResizable(True)
+        self.ladder_scroll.setMinimumHeight(220)
+        self._ladder_centered = False
+        self.depth_chart = DepthChart(range_bps=50)
+        book_layout.addWidget(self.ladder_scroll, stretch=1)
+        book_layout.addWidget(self.depth_chart, stretch=1)
+        book_group.setLayout(book_layout)
+        main_layout.addWidget(book_group)
+
+        # ========== COST HISTORY GROUP ==========
+        history_group = QGroupBox("Cost History")
+        history_group.setStyleSheet(input_group.styleSheet())
+        history_layout = QVBoxLayout()
+        self.history_span_input = QComboBox()
+        self.history_span_input.addItems(["1 min", "5 min", "30 min", "2 h"])
+        self.history_span_input.setCurrentText("5 min")
+        self.history_span_input.currentTextChanged.connect(self.update_history_span)
+        self.cost_chart = CostHistoryChart(span_s=300.0)
+        history_layout.addWidget(self.history_span_input, alignment=Qt.AlignmentFlag.AlignRight)
+        history_layout.addWidget(self.cost_chart)
+        history_group.setLayout(history_layout)
+        main_layout.addWidget(history_group)
+
         # ========== LATENCY GROUP ==========
         latency_group = QGroupBox("Latency Metrics")
         latency_group.setStyleSheet(input_group.styleSheet())
@@ -154,26 +204,81 @@ class MainWindow(QWidget):
         self.processing_latency_label = QLabel("0 ms")
         self.ui_latency_label = QLabel("0 ms")
         self.total_latency_label = QLabel("0 ms")
+        self.coalesced_label = QLabel("0 dropped | 0 coalesced frames")
+        self.queue_label = QLabel("depth 0 | 0 dropped | 0.00 ms wait")
 
-        latency_layout.addWidget(QLabel("Stream Latency:"), 0, 0, alignment=Qt.AlignmentFlag.AlignRight)
+        latency_layout.addWidget(QLabel("Message Interval:"), 0, 0, alignment=Qt.AlignmentFlag.AlignRight)
         latency_layout.addWidget(self.stream_latency_label, 0, 1)
         latency_layout.addWidget(QLabel("Processing Latency:"), 1, 0, alignment=Qt.AlignmentFlag.AlignRight)
         latency_layout.addWidget(self.processing_latency_label, 1, 1)
         latency_layout.addWidget(QLabel("UI Latency:"), 2, 0, alignment=Qt.AlignmentFlag.AlignRight)
         latency_layout.addWidget(self.ui_latency_label, 2, 1)
-        latency_layout.addWidget(QLabel("Total Latency:"), 3, 0, alignment=Qt.AlignmentFlag.AlignRight)
+        latency_layout.addWidget(QLabel("End-to-End Latency:"), 3, 0, alignment=Qt.AlignmentFlag.AlignRight)
         latency_layout.addWidget(self.total_latency_label, 3, 1)
+        latency_layout.addWidget(QLabel("UI Coalescing:"), 4, 0, alignment=Qt.AlignmentFlag.AlignRight)
+        latency_layout.addWidget(self.coalesced_label, 4, 1)
+        latency_layout.addWidget(QLabel("Compute Queue:"), 5, 0, alignment=Qt.AlignmentFlag.AlignRight)
+        latency_layout.addWidget(self.queue_label, 5, 1)
 
-        for row in range(4):
+        for row in range(6):
             for col in [0, 1]:
                 item = latency_layout.itemAtPosition(row, col)
                 if item and item.widget():
                     item.widget().setStyleSheet(label_bold_style if col == 0 else value_style)
 
         latency_group.setLayout(latency_layout)
-        main_layout.addWidget(latency_group)
+
+        # ========== LATENCY PERCENTILES GROUP ==========
+        percentile_group = QGroupBox("Latency Percentiles")
+        percentile_group.setStyleSheet(input_group.styleSheet())
+
+        percentile_layout = QGridLayout()
+        percentile_layout.setVerticalSpacing(6)
+        percentile_layout.setHorizontalSpacing(16)
+
+        headers = ["Stage", "p50", "p99", "p99.9", "Max", "Count"]
+        for col, header in enumerate(headers):
+            header_label = QLabel(header)
+            header_label.setStyleSheet(label_bold_style)
+            percentile_layout.addWidget(header_label, 0, col, alignment=Qt.AlignmentFlag.AlignRight)
+
+        self.percentile_labels = {}
+        for row, stage in enumerate(STAGES, start=1):
+            stage_label = QLabel(stage.replace("_", " ").title() + ":")
+            stage_label.setStyleSheet(label_bold_style)
+            percentile_layout.addWidget(stage_label, row, 0, alignment=Qt.AlignmentFlag.AlignRight)
+            labels = []
+            for col in range(1, len(headers)):
+                value_label = QLabel("-")
+                value_label.setStyleSheet(value_style)
+                percentile_layout.addWidget(value_label, row, col, alignment=Qt.AlignmentFlag.AlignRight)
+                labels.append(value_label)
+            self.percentile_labels[stage] = labels
+
+        self.export_latency_button = QPushButton("Export")
+        self.export_latency_button.setStyleSheet(self.set_button.styleSheet())
+        self.export_latency_button.clicked.connect(self.export_latency)
+        percentile_layout.addWidget(self.export_latency_button, len(STAGES) + 1, 0, 1, len(headers),
+                                    alignment=Qt.AlignmentFlag.AlignCenter)
+
+        percentile_group.setLayout(percentile_layout)
+
+        latency_row = QHBoxLayout()
+        latency_row.setSpacing(30)
+        latency_row.addWidget(latency_group, stretch=1)
+        latency_row.addWidget(percentile_group, stretch=1)
+        main_layout.addLayout(latency_row)
 
         self.setLayout(main_layout)
+
+        self.latency_timer = QTimer(self)
+        self.latency_timer.setInterval(500)
+        self.latency_timer.timeout.connect(self.update_latency_panel)
+        self.latency_timer.start()
+
+        # The worker publishes into per-feed slots; the GUI renders the latest one per frame
+        self.bridge = UiUpdateBridge(self.current_slot, self.display_update, fps=ui_fps, parent=self)
+        self.bridge.start()
         self.start_worker()
 
     def get_fee_tier(self):
@@ -204,39 +309,137 @@ class MainWindow(QWidget):
             port="443",
             target="/ws/l2-orderbook/okx/BTC-USDT-SWAP",
             usd_amount=usd_amount,
-            fee_tier=fee_tier
+            fee_tier=fee_tier,
+            source=ReplaySource(self.replay_path, speed=self.replay_speed) if self.replay_path else None,
+            record_path=self.record_path,
+            tick_store_path=self.tick_store_path,
+            feeds=self.feeds,
+            shm_prefix=self.shm_prefix,
+            pipeline=self.pipeline,
+            fees=self.fees
         )
         self.worker.moveToThread(self.thread)
 
+        self.update_feed_inputs()
+
         self.thread.started.connect(self.worker.run)
-        self.worker.result_signal.connect(self.display_result)
         self.worker.finished.connect(self.thread.quit)
         self.thread.start()
 
-    def display_result(self, result):
+    def update_feed_inputs(self):
+        selected = self.exchange_input.currentText()
+        exchanges = sorted({key.exchange for key in self.worker.manager.feeds})
+        self.exchange_input.blockSignals(True)
+        self.exchange_input.clear()
+        self.exchange_input.addItems(exchanges)
+        if selected in exchanges:
+            self.exchange_input.setCurrentText(selected)
+        self.exchange_input.blockSignals(False)
+        self.update_asset_input()
+
+    def update_asset_input(self):
+        if self.worker is None:
+            return
+        selected = self.asset_input.currentText()
+        exchange = self.exchange_input.currentText()
+        symbols = [key.symbol for key in self.worker.manager.feeds if key.exchange == exchange]
+        self.asset_input.clear()
+        self.asset_input.addItems(symbols)
+        if selected in symbols:
+            self.asset_input.setCurrentText(selected)
+
+    def update_history_span(self, text):
+        value, unit = text.split()
+        self.cost_chart.set_span(float(value) * (60.0 if unit == "min" else 3600.0))
+
+    def current_slot(self):
+        if self.worker is None:
+            return None
+        return self.worker.slot(FeedKey(self.exchange_input.currentText(), self.asset_input.currentText()))
+
+    def set_label_text(self, label, text):
+        # Skip the relabel (and the repaint it triggers) when the formatted value is unchanged
+        if self._label_text.get(label) != text:
+            self._label_text[label] = text
+            label.setText(text)
+
+    def display_update(self, update):
         start_ui_time = time.perf_counter()
+        result = update.result
+        order_book = update.order_book
+        maker_taker = result.maker_taker_result
+
+        self.set_label_text(self.top_ask, f"${order_book.ask_prices[0]:.2f}")
+        self.set_label_text(self.top_bid, f"${order_book.bid_prices[0]:.2f}")
+        self.depth_ladder.set_book(order_book)
+        self.depth_chart.set_book(order_book)
+        self.cost_chart.set_series(self.worker.history(update.key))
+        if not self._ladder_centered:
+            # Start with the spread in view; the user can scroll from there
+            self._ladder_centered = True
+            spread_y = self.depth_ladder.levels * self.depth_ladder.row_height
+            self.ladder_scroll.ensureVisible(0, spread_y, 0, self.ladder_scroll.height() // 2)
+
+        self.set_label_text(self.slippage_label, f"{result.slippage:.5f} %")
+        self.set_label_text(self.fee_label, f"${result.fee:.2f}")
+        self.set_label_text(self.impact_label, f"${result.market_impact:.2f}")
+        self.set_label_text(self.net_cost_label, f"${result.net_cost:.2f}")
+        self.set_label_text(
+            self.maker_taker_label,
+            f"Maker: {maker_taker.maker_prob:.4f} | Taker: {maker_taker.taker_prob:.4f}"
+        )
+        features = update.features
+        if features is not None:
+            self.set_label_text(self.microprice_label, f"${features.microprice:.2f}")
+            self.set_label_text(
+                self.imbalance_label, f"{features.imbalance:+.3f} | {features.depth_imbalance[1]:+.3f}"
+            )
+
+        trace = update.trace
+        trace.rendered = time.perf_counter_ns()
+        self.worker.latency.record_render(trace)
+        ui_latency = (time.perf_counter() - start_ui_time) * 1000
 
-        self.top_ask.setText(f"${result['top_ask'].price:.2f}")
-        self.top_bid.setText(f"${result['top_bid'].price:.2f}")
+        self.set_label_text(self.stream_latency_label, f"{update.interarrival_ms:.2f} ms")
+        self.set_label_text(self.processing_latency_label, f"{update.processing_latency_ms:.2f} ms")
+        self.set_label_text(self.ui_latency_label, f"{ui_latency:.2f} ms")
+        self.set_label_text(self.total_latency_label, f"{(trace.rendered - trace.recv) / 1e6:.2f} ms")
 
-        self.slippage_label.setText(f"{result['slippage']:.5f} %")
-        self.fee_label.setText(f"${result['fee']:.2f}")
-        self.impact_label.setText(f"${result['impact']:.2f}")
-        self.net_cost_label.setText(f"${result['net_cost']:.2f}")
-        self.maker_taker_label.setText(
-            f"Maker: {result['maker_prob']:.4f} | Taker: {result['taker_prob']:.4f}"
+        stats = self.bridge.stats
+        self.set_label_text(
+            self.coalesced_label,
+            f"{stats.dropped_ticks} dropped | {stats.coalesced_frames} coalesced frames"
+        )
+        queue = self.worker.manager.queue_stats(update.key)
+        self.set_label_text(
+            self.queue_label,
+            f"depth {queue.depth} | {queue.dropped} dropped | {queue.last_wait_ms:.2f} ms wait"
+            f" | {queue.resyncs} resyncs"
         )
 
-        stream_latency = result.get('stream_latency_ms', 0)
-        processing_latency = result.get('processing_latency_ms', 0)
-        ui_latency = (time.perf_counter() - start_ui_time) * 1000
-
-        self.stream_latency_label.setText(f"{stream_latency:.2f} ms")
-        self.processing_latency_label.setText(f"{processing_latency:.2f} ms")
-        self.ui_latency_label.setText(f"{ui_latency:.2f} ms")
-        self.total_latency_label.setText(f"{(stream_latency + processing_latency + ui_latency):.2f} ms")
+    def update_latency_panel(self):
+        if self.worker is None:
+            return
+        summary = self.worker.latency.summary()
+        for stage, labels in self.percentile_labels.items():
+            row = summary[stage]
+            texts = [f"{row[k]:.3f} ms" for k in ("p50_ms", "p99_ms", "p99.9_ms", "max_ms")]
+            texts.append(str(row["count"]))
+            for label, text in zip(labels, texts):
+                self.set_label_text(label, text)
+
+    def export_latency(self):
+        if self.worker is None:
+            return
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Latency Histograms", "latency.json", "JSON (*.json);;CSV (*.csv)"
+        )
+        if path:
+            self.worker.latency.export(path)
 
     def closeEvent(self, event):
+        self.latency_timer.stop()
+        self.bridge.stop()
         if self.worker:
             self.worker.stop()
         if self.thread:
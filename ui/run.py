@@ -1,10 +1,32 @@
+import argparse
 import sys
 from PyQt6.QtWidgets import QApplication
+from core.cli import positive_int
+from core.feed_manager import PipelineConfig, QueuePolicy
+from core.fees import fee_registry
 from .main_window import MainWindow
 
 def main():
-    app = QApplication(sys.argv)
-    window = MainWindow()
+    parser = argparse.ArgumentParser(description="Trade Execution Simulator")
+    parser.add_argument("--replay", help="replay a recorded market data file instead of the live feed")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay pace multiplier, 0 for as fast as possible")
+    parser.add_argument("--record", help="record received messages to this file")
+    parser.add_argument("--store", help="append top-of-book snapshots and costs to this tick store")
+    parser.add_argument("--feed", action="append", default=[], metavar="EXCHANGE:SYMBOL",
+                        help="additional instrument to track, e.g. OKX:ETH-USDT-SWAP (repeatable)")
+    parser.add_argument("--shm", metavar="PREFIX", help="publish latest costs to shared memory rings for local readers")
+    parser.add_argument("--policy", choices=[p.value for p in QueuePolicy], default=QueuePolicy.LATEST_ONLY.value,
+                        help="books to analyze when compute falls behind: all, latest only, or every Nth")
+    parser.add_argument("--sample-every", type=positive_int, default=1, help="N for --policy sample")
+    parser.add_argument("--fees", help="fee schedule config (JSON) instead of the bundled core/fee_schedules.json")
+    parser.add_argument("--fps", type=float, default=30.0, help="maximum UI refresh rate")
+    args, qt_args = parser.parse_known_args()
+
+    app = QApplication(sys.argv[:1] + qt_args)
+    window = MainWindow(replay_path=args.replay, replay_speed=args.speed or None, record_path=args.record,
+                        tick_store_path=args.store, feeds=args.feed, ui_fps=args.fps,
+                        shm_prefix=args.shm, fees=fee_registry(args.fees) if args.fees else None,
+                        pipeline=PipelineConfig(policy=QueuePolicy(args.policy), sample_every=args.sample_every))
     window.show()
     sys.exit(app.exec())
 
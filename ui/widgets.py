@@ -1,3 +1,8 @@
+from abc import ABCMeta, abstractmethod
+
+import numpy as np
+from PyQt6.QtCore import QLineF, QPointF, QRect, Qt, QTimer
+from PyQt6.QtGui import QColor, QPainter, QPalette, QPolygonF
 from PyQt6.QtWidgets import QWidget, QLabel, QComboBox, QLineEdit, QHBoxLayout
 
 class LabeledComboBox(QWidget):
@@ -29,3 +34,271 @@ class LabeledLineEdit(QWidget):
 
     def text(self):
         return self.line_edit.text()
+
+class _QtABCMeta(type(QWidget), ABCMeta):
+    """Lets a QWidget subclass declare abstract methods."""
+
+class ThrottledBookView(QWidget, metaclass=_QtABCMeta):
+    """Base for views fed from ``OrderBook`` arrays at feed rate.
+
+    ``set_book`` only keeps the newest book; it is applied at most ``max_fps`` times a
+    second, so a burst of ticks costs one redraw. Subclasses implement ``apply_book``.
+    """
+
+    def __init__(self, max_fps=20.0, parent=None):
+        super().__init__(parent)
+        self._pending = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(max(1, int(1000.0 / max_fps)))
+        self._timer.timeout.connect(self._flush)
+
+    def set_book(self, order_book):
+        self._pending = order_book
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def _flush(self):
+        order_book, self._pending = self._pending, None
+        if order_book is not None:
+            self.apply_book(order_book)
+
+    @abstractmethod
+    def apply_book(self, order_book):
+        ...
+
+class DepthLadder(ThrottledBookView):
+    """Price ladder with asks above and bids below the spread, painted straight from the
+    book arrays. Only rows whose price or size changed are repainted; cumulative depth,
+    which shifts every row behind a change, is left to ``DepthChart``."""
+
+    ASK_COLOR = QColor(214, 69, 65)
+    BID_COLOR = QColor(38, 166, 91)
+
+    def __init__(self, levels=400, row_height=16, price_decimals=2, size_decimals=4, max_fps=20.0, parent=None):
+        super().__init__(max_fps, parent)
+        self.levels = levels
+        self.row_height = row_height
+        self.price_decimals = price_decimals
+        self.size_decimals = size_decimals
+        # One row per level: price and size; asks first (worst to best), then bids
+        self._rows = np.zeros((2 * levels, 2))
+        self._bar_scale = 0.0
+        self.repainted_rows = 0
+        self.setMinimumWidth(200)
+        self.setFixedHeight(2 * levels * row_height)
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
+
+    def _layout(self, order_book) -> np.ndarray:
+        n = self.levels
+        rows = np.zeros((2 * n, 2))
+        asks = min(n, order_book.ask_prices.size)
+        bids = min(n, order_book.bid_prices.size)
+        # Asks are reversed so the best ask sits just above the spread
+        rows[n - asks:n, 0] = order_book.ask_prices[:asks][::-1]
+        rows[n - asks:n, 1] = order_book.ask_sizes[:asks][::-1]
+        rows[n:n + bids, 0] = order_book.bid_prices[:bids]
+        rows[n:n + bids, 1] = order_book.bid_sizes[:bids]
+        return rows
+
+    def apply_book(self, order_book):
+        rows = self._layout(order_book)
+        max_size = rows[:, 1].max()
+        # Bars scale to a power of two so ordinary size changes do not rescale every row
+        scale = 2.0 ** np.ceil(np.log2(max_size)) if max_size > 0 else 0.0
+        if scale != self._bar_scale:
+            self._bar_scale = scale
+            self._rows = rows
+            self.repainted_rows += rows.shape[0]
+            self.update()
+            return
+
+        changed = np.flatnonzero((rows != self._rows).any(axis=1))
+        self._rows = rows
+        if changed.size == 0:
+            return
+        self.repainted_rows += changed.size
+        # One update rect per run of consecutive changed rows
+        breaks = np.flatnonzero(np.diff(changed) > 1) + 1
+        width, h = self.width(), self.row_height
+        for run in np.split(changed, breaks):
+            self.update(QRect(0, int(run[0]) * h, width, int(run.size) * h))
+
+    def paintEvent(self, event):
+        rect = event.rect()
+        h = self.row_height
+        first = max(0, rect.top() // h)
+        last = min(self._rows.shape[0], rect.bottom() // h + 1)
+        width = self.width()
+        painter = QPainter(self)
+        painter.fillRect(rect, self.palette().color(QPalette.ColorRole.Base))
+        text_color = self.palette().color(QPalette.ColorRole.Text)
+        column = width // 2
+        scale = self._bar_scale
+        for row, (price, size) in enumerate(self._rows[first:last].tolist(), start=first):
+            if price == 0.0:
+                continue
+            y = row * h
+            color = self.ASK_COLOR if row < self.levels else self.BID_COLOR
+            if scale > 0:
+                bar = QColor(color)
+                bar.setAlpha(60)
+                painter.fillRect(width - int(width * size / scale), y + 1, int(width * size / scale), h - 2, bar)
+            painter.setPen(color)
+            painter.drawText(QRect(4, y, column - 8, h), Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft,
+                             f"{price:.{self.price_decimals}f}")
+            painter.setPen(text_color)
+            painter.drawText(QRect(column, y, column - 4, h), Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignRight,
+                             f"{size:.{self.size_decimals}f}")
+        painter.end()
+
+class DepthChart(ThrottledBookView):
+    """Cumulative depth staircase, bids left and asks right of mid, optionally limited to
+    ``range_bps`` around mid."""
+
+    def __init__(self, range_bps=None, max_fps=10.0, parent=None):
+        super().__init__(max_fps, parent)
+        self.range_bps = range_bps
+        self._sides = None
+        self.setMinimumSize(260, 160)
+
+    def apply_book(self, order_book):
+        if order_book.is_empty():
+            self._sides = None
+        else:
+            bid_prices, bid_cum = order_book.bid_prices, order_book.bid_depth[0]
+            ask_prices, ask_cum = order_book.ask_prices, order_book.ask_depth[0]
+            if self.range_bps is not None:
+                mid = order_book.mid_price()
+                offset = mid * self.range_bps / 10_000.0
+                bids = int(np.searchsorted(-bid_prices, -(mid - offset), side="right"))
+                asks = int(np.searchsorted(ask_prices, mid + offset, side="right"))
+                bid_prices, bid_cum = bid_prices[:max(bids, 1)], bid_cum[:max(bids, 1)]
+                ask_prices, ask_cum = ask_prices[:max(asks, 1)], ask_cum[:max(asks, 1)]
+            self._sides = (bid_prices, bid_cum, ask_prices, ask_cum)
+        self.update()
+
+    @staticmethod
+    def _staircase(prices, cumulative, to_x, to_y, base_y) -> QPolygonF:
+        xs = to_x(prices).tolist()
+        ys = to_y(cumulative).tolist()
+        points = [QPointF(xs[0], base_y)]
+        previous_y = base_y
+        for x, y in zip(xs, ys):
+            points.append(QPointF(x, previous_y))
+            points.append(QPointF(x, y))
+            previous_y = y
+        points.append(QPointF(xs[-1], base_y))
+        return QPolygonF(points)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self.palette().color(QPalette.ColorRole.Base))
+        if self._sides is None:
+            painter.end()
+            return
+        bid_prices, bid_cum, ask_prices, ask_cum = self._sides
+        margin = 6
+        width, height = self.width() - 2 * margin, self.height() - 2 * margin
+        low, high = float(bid_prices[-1]), float(ask_prices[-1])
+        top = max(float(bid_cum[-1]), float(ask_cum[-1]))
+        if high <= low or top <= 0:
+            painter.end()
+            return
+        base_y = margin + height
+
+        def to_x(prices):
+            return margin + (prices - low) / (high - low) * width
+
+        def to_y(cumulative):
+            return base_y - cumulative / top * height
+
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        for prices, cumulative, color in ((bid_prices, bid_cum, DepthLadder.BID_COLOR),
+                                          (ask_prices, ask_cum, DepthLadder.ASK_COLOR)):
+            fill = QColor(color)
+            fill.setAlpha(70)
+            painter.setPen(color)
+            painter.setBrush(fill)
+            painter.drawPolygon(self._staircase(prices, cumulative, to_x, to_y, base_y))
+        painter.end()
+
+class CostHistoryChart(QWidget):
+    """Rolling chart of the last ``span_s`` seconds of a ``SeriesRing``, one lane per column.
+
+    Each pixel column is drawn as a vertical line from the min to the max of the samples
+    that fall in it, so spikes survive decimation and a frame costs O(width).
+    """
+
+    LANE_COLORS = (QColor(74, 144, 226), QColor(230, 126, 34), QColor(142, 68, 173))
+    LABELS = {"slippage": "Slippage %", "market_impact": "Impact $", "net_cost": "Net Cost $"}
+
+    def __init__(self, span_s=300.0, max_fps=10.0, parent=None):
+        super().__init__(parent)
+        self.span_s = span_s
+        self._series = None
+        self._drawn_count = -1
+        self._timer = QTimer(self)
+        self._timer.setInterval(max(1, int(1000.0 / max_fps)))
+        self._timer.timeout.connect(self._refresh)
+        self._timer.start()
+        self.setMinimumSize(400, 180)
+
+    def set_series(self, series):
+        if series is not self._series:
+            self._series = series
+            self._drawn_count = -1
+            self.update()
+
+    def set_span(self, span_s):
+        self.span_s = span_s
+        self._drawn_count = -1
+        self.update()
+
+    def _refresh(self):
+        if self._series is not None and self._series.count != self._drawn_count:
+            self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self.palette().color(QPalette.ColorRole.Base))
+        series = self._series
+        end, last = (None, None) if series is None else series.last()
+        if end is None:
+            painter.end()
+            return
+        self._drawn_count = series.count
+        margin = 6
+        width = self.width() - 2 * margin
+        lo, hi = series.decimate(end - self.span_s, end, width)
+        lanes = len(series.columns)
+        lane_height = (self.height() - 2 * margin) / lanes
+        text_color = self.palette().color(QPalette.ColorRole.Text)
+        xs = np.arange(width, dtype=np.float64) + margin + 0.5
+
+        for lane, name in enumerate(series.columns):
+            top = margin + lane * lane_height
+            bottom = top + lane_height - 4
+            painter.setPen(self.palette().color(QPalette.ColorRole.Mid))
+            painter.drawLine(QLineF(margin, bottom + 2, margin + width, bottom + 2))
+            column_lo, column_hi = lo[:, lane], hi[:, lane]
+            present = ~np.isnan(column_lo)
+            if present.any():
+                low, high = float(column_lo[present].min()), float(column_hi[present].max())
+                if high <= low:
+                    pad = max(abs(low) * 1e-3, 1e-9)
+                    low, high = low - pad, high + pad
+                plot_top = top + 16
+                scale = (bottom - plot_top) / (high - low)
+                y_lo = (bottom - (column_lo[present] - low) * scale).tolist()
+                # Keep flat stretches visible as at least one pixel
+                y_hi = np.minimum(bottom - (column_hi[present] - low) * scale, np.array(y_lo) - 1).tolist()
+                painter.setPen(self.LANE_COLORS[lane % len(self.LANE_COLORS)])
+                painter.drawLines([QLineF(x, a, x, b) for x, a, b in zip(xs[present].tolist(), y_lo, y_hi)])
+                painter.setPen(text_color)
+                painter.drawText(QRect(margin, int(top), width, 16), Qt.AlignmentFlag.AlignRight,
+                                 f"{low:.4g} .. {high:.4g}")
+            painter.setPen(text_color)
+            painter.drawText(QRect(margin, int(top), width, 16), Qt.AlignmentFlag.AlignLeft,
+                             f"{self.LABELS.get(name, name)}: {last[lane]:.5f}")
+        painter.end()